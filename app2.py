@@ -1,20 +1,37 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import os
+import uuid
 from datetime import datetime, timedelta
-import requests
-import base64
-from io import StringIO
 from urllib.parse import quote_plus
 
+from utils.facets import FacetIndex, to_mask, to_positions
+from utils.exports import ExportCache, download_on_demand
+from utils.github_store import GitHubStore, API_ROOT
+from utils.inventory import PropertyStore
+from utils.pagination import current_page, pager
+from utils.range_index import RangeIndex, range_slider
+from utils.reels import ReelPosters, embed_html, EMBED_HEIGHT
+from utils.shortlist_store import Shortlist, ShortlistStore
+from utils.spool import Spool
+from utils.lead_dedupe import LeadDeduper
+from utils.lead_writer import LeadWriter, LEAD_COLUMNS
+from utils.normalize import LAKH, ON_REQUEST, format_inr, normalize_prices
+from utils.storage import get_backend
+
 if "admin" not in st.session_state:
     st.session_state.admin = False
 
-if "favorites" not in st.session_state:
-    st.session_state.favorites = []
-
 if "compare" not in st.session_state:
     st.session_state.compare = False
 
+if "visitor_id" not in st.session_state:
+    st.session_state.visitor_id = uuid.uuid4().hex
+
+if "active_reel" not in st.session_state:
+    st.session_state.active_reel = None
+
 
 
 # ---------------- CONFIG ----------------
@@ -25,12 +42,18 @@ DATA_PATH = "data"
 PROPERTIES_FILE = "properties.csv"
 LEADS_FILE = "leads.csv"
 
-GITHUB_TOKEN = st.secrets["github_token"]
-
-HEADERS = {
-    "Authorization": f"token {GITHUB_TOKEN}",
-    "Accept": "application/vnd.github.v3+json"
-}
+STORAGE_BACKEND = st.secrets.get("storage_backend", "github")  # github | sqlite | csv
+SQLITE_PATH = os.path.join(DATA_PATH, "prasad_realty.db")
+LEAD_SPOOL = os.path.join(DATA_PATH, "leads.spool.jsonl")  # accepted GitHub leads not yet committed
+
+GITHUB_TOKEN = st.secrets.get("github_token")
+GITHUB_CACHE_TTL = st.secrets.get("github_cache_ttl", 60)  # seconds
+GITHUB_API_URL = st.secrets.get("github_api_url", API_ROOT)  # tools/github_stub.py for offline runs
+LEAD_FLUSH_SECONDS = st.secrets.get("lead_flush_seconds", 5)
+LEAD_BATCH_SIZE = st.secrets.get("lead_batch_size", 20)
+LEAD_DEDUPE_SECONDS = st.secrets.get("lead_dedupe_seconds", 600)  # repeat reveals within this window aren't re-saved
+PAGE_SIZE = st.secrets.get("page_size", 9)  # property cards per page
+SHORTLIST_DB = os.path.join(DATA_PATH, "shortlists.db")  # saved favorites, keyed by ?sl=
 # ---------------- BRANDING ----------------
 st.markdown("""
 <style>
@@ -81,31 +104,88 @@ hr {
 """, unsafe_allow_html=True)
 
 # ---------------- GITHUB HELPERS ----------------
-def github_url(file):
-    return f"https://api.github.com/repos/{GITHUB_REPO}/contents/{DATA_PATH}/{file}"
+@st.cache_resource
+def github_store():
+    # One store per process: its cache is shared by every visitor's session.
+    return GitHubStore(GITHUB_REPO, GITHUB_TOKEN, DATA_PATH, ttl=GITHUB_CACHE_TTL, api_root=GITHUB_API_URL)
+
+@st.cache_resource
+def lead_writer():
+    # Leads are spooled to disk, queued and committed in batches instead of one PUT per click.
+    return LeadWriter(github_store(), LEADS_FILE, flush_interval=LEAD_FLUSH_SECONDS, max_batch=LEAD_BATCH_SIZE,
+                      spool=Spool(LEAD_SPOOL))
+
+@st.cache_resource
+def reel_posters():
+    # Reel thumbnails are fetched once per process, not per card per rerun.
+    return ReelPosters()
+
+@st.cache_resource
+def shortlist_store():
+    # One SQLite file holds every session's saved shortlists.
+    return ShortlistStore(SHORTLIST_DB)
 
-def read_csv_from_github(file):
-    r = requests.get(github_url(file), headers=HEADERS)
-    content = base64.b64decode(r.json()["content"])
-    return pd.read_csv(StringIO(content.decode()))
-
-def write_csv_to_github(df, file, message):
-    r = requests.get(github_url(file), headers=HEADERS)
-    sha = r.json()["sha"]
-
-    csv_data = df.to_csv(index=False)
-    encoded = base64.b64encode(csv_data.encode()).decode()
-
-    payload = {
-        "message": message,
-        "content": encoded,
-        "sha": sha
-    }
-    requests.put(github_url(file), headers=HEADERS, json=payload)
+if "favorites" not in st.session_state:
+    # Ids only; ?sl=<token> reopens saved favorites after a reconnect.
+    st.session_state.favorites = Shortlist(shortlist_store(), st.query_params.get("sl"))
+
+def note_repeat(lead, count):
+    # Repeats aren't new leads; once the window closes the first one gets the total.
+    storage().amend_lead(lead, {"notes": f"Revealed {count}x"})
+
+@st.cache_resource
+def lead_deduper():
+    # Shared by all sessions; keys are (visitor, property, lead type).
+    return LeadDeduper(window=LEAD_DEDUPE_SECONDS, on_repeat=note_repeat)
+
+@st.cache_resource
+def exports():
+    # Admin exports are written on request, chunk by chunk, and reused by content hash.
+    return ExportCache()
+
+# ---------------- STORAGE ----------------
+@st.cache_resource
+def storage():
+    if STORAGE_BACKEND == "github":
+        return get_backend("github", store=github_store(), lead_writer=lead_writer(), properties_file=PROPERTIES_FILE)
+    if STORAGE_BACKEND == "sqlite":
+        return get_backend("sqlite", path=SQLITE_PATH, seed_properties=os.path.join(DATA_PATH, PROPERTIES_FILE))
+    # Local CSVs; bookings share leads.csv like on GitHub. data/leads.csv is
+    # tracked in git (its mtime is the checkout time), so it is never rotated.
+    leads_path = os.path.join(DATA_PATH, LEADS_FILE)
+    return get_backend(
+        "csv",
+        properties_path=os.path.join(DATA_PATH, PROPERTIES_FILE),
+        leads_path=leads_path, bookings_path=leads_path,
+        lead_columns=LEAD_COLUMNS, booking_columns=LEAD_COLUMNS, rotate=False,
+    )
 
 # ---------------- DATA ----------------
-props = read_csv_from_github(PROPERTIES_FILE)
-props = props[props["is_active"] == True]
+@st.cache_resource(max_entries=2)
+def inventory(version):
+    # Rebuilt only when the properties file changes (blob sha / mtime / db counter),
+    # so the unit normalisation (total ₹, sqft, ₹/sqft) runs once per version too.
+    return PropertyStore(
+        normalize_prices(storage().read_properties()).to_dict(orient="records"),
+        id_field="property_id",
+        categorical=("locality", "property_category"),
+        float32=(),
+        flags=(),
+        search_fields=("title", "highlights", "investment_tags"),
+    )
+
+store = inventory(storage().properties_version())
+facets = store.derived("facets", lambda s: FacetIndex(s.frame, ("locality", "property_category", "is_active")))
+active = facets.bits("is_active", [True])
+props = store.frame.iloc[to_positions(active, len(store))]
+
+SORT_KEYS = {
+    "Listing order": None,
+    "Price (low → high)": ("total_price_inr", False),
+    "Price (high → low)": ("total_price_inr", True),
+    "Price / sqft (low → high)": ("price_per_sqft", False),
+    "Area (large → small)": ("area_sqft", True),
+}
 
 # ---------------- HEADER ----------------
 col1, col2 = st.columns([1, 6])
@@ -127,13 +207,42 @@ with col2:
 # ---------------- FILTERS ----------------
 with st.sidebar:
     st.subheader("Filters")
-    area = st.multiselect("Area", props["locality"].unique(), default=props["locality"].unique())
-    category = st.multiselect("Type", props["property_category"].unique(), default=props["property_category"].unique())
-
-filtered = props[
-    (props["locality"].isin(area)) &
-    (props["property_category"].isin(category))
-]
+    areas = facets.values("locality", within=active)
+    area = st.multiselect("Area", areas, default=areas)
+    area_counts = st.empty()
+    categories = facets.values("property_category", within=active)
+    category = st.multiselect("Type", categories, default=categories)
+    category_counts = st.empty()
+    # Sorted canonical columns + per-row histogram bins, built once per inventory version.
+    price_index = store.derived(("range", "total_price_inr"), lambda s: RangeIndex(s.frame["total_price_inr"] / LAKH))
+    area_index = store.derived(("range", "area_sqft"), lambda s: RangeIndex(s.frame["area_sqft"]))
+    budget = range_slider(st, "Budget (₹ Lakhs)", price_index, step=1.0, format="%.0f")
+    budget_hist = st.empty()
+    area_range = range_slider(st, "Area (sqft)", area_index, step=50.0, format="%.0f")
+    area_hist = st.empty()
+    sort_by = st.selectbox("Sort by", list(SORT_KEYS))
+
+selection = {"locality": area, "property_category": category}
+selected = to_mask(facets.select(active, **selection), len(store))
+mask = selected
+if budget is not None:
+    mask = price_index.restrict(mask, *budget)
+if area_range is not None:
+    mask = area_index.restrict(mask, *area_range)
+if SORT_KEYS[sort_by] is None:
+    filtered_pos = np.flatnonzero(mask)
+else:
+    # Walks an argsort built once per inventory version; unpriced listings come last.
+    filtered_pos = store.ordered(mask, *SORT_KEYS[sort_by])
+page, pages = current_page("grid_page", len(filtered_pos), PAGE_SIZE,
+                           reset_on=(selection, budget, area_range, sort_by, store.version))
+# Only this page's rows are rendered (and only they get reel embeds).
+filtered = store.frame.iloc[filtered_pos[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]]
+area_counts.caption(facets.caption("locality", selection, active))
+category_counts.caption(facets.caption("property_category", selection, active))
+# Histograms over the area/type selection, before the ranges themselves apply.
+budget_hist.bar_chart(price_index.histogram(np.flatnonzero(selected)), height=90)
+area_hist.bar_chart(area_index.histogram(np.flatnonzero(selected)), height=90)
 with st.sidebar:
     st.subheader("Admin Login")
     pwd = st.text_input("Password", type="password")
@@ -147,7 +256,7 @@ with st.sidebar:
 with st.sidebar:
     st.subheader("⭐ Favorites")
     if st.session_state.favorites:
-        fav_props = props[props["property_id"].isin(st.session_state.favorites)]
+        fav_props = props[props["property_id"].isin(list(st.session_state.favorites))]
         st.sidebar.write(f"Selected: {len(fav_props)}")
         if len(fav_props) > 3:
             st.sidebar.warning("Select up to 3 properties to compare")
@@ -160,16 +269,19 @@ if st.session_state.compare:
     st.subheader("🔁 Property Comparison")
 
     compare_df = props[
-        props["property_id"].isin(st.session_state.favorites[:3])
-    ][[
-        "title",
-        "locality",
-        "property_category",
-        "size_value",
-        "size_unit",
-        "price_value",
-        "price_unit"
-    ]]
+        props["property_id"].isin(list(st.session_state.favorites)[:3])
+    ]
+    compare_df = pd.DataFrame({
+        "Title": compare_df["title"],
+        "Locality": compare_df["locality"],
+        "Type": compare_df["property_category"],
+        "Size": compare_df["size_value"].astype(str) + " " + compare_df["size_unit"].astype(str),
+        "Area (sqft)": compare_df["area_sqft"].map(lambda v: f"{v:,.0f}" if pd.notna(v) else "—"),
+        "Quoted price": (compare_df["price_value"].astype(str) + " " + compare_df["price_unit"].astype(str))
+                        .where(compare_df["price_value"].notna(), "On request"),
+        "Total price": compare_df["total_price_inr"].map(format_inr),
+        "₹ / sqft": compare_df["price_per_sqft"].map(lambda v: f"₹{v:,.0f}" if pd.notna(v) else "—"),
+    }).set_index("Title")
 
     st.dataframe(compare_df.T, use_container_width=True)
 
@@ -179,40 +291,55 @@ if st.session_state.compare:
     st.divider()
 
 # ---------------- PROPERTY CARDS ----------------
+st.caption(f"{len(filtered_pos)} properties")
 cols = st.columns(3)
+# Queued in the background; cards show the placeholder until a poster is cached.
+reel_posters().prefetch(filtered["reel_url"])
 
-for i, row in filtered.iterrows():
-    with cols[i % 3]:
+for n, (i, row) in enumerate(filtered.iterrows()):
+    with cols[n % 3]:
         st.subheader(row["title"])
         st.caption(f"{row['locality']} • {row['property_category']}")
         st.write(f"📐 {row['size_value']} {row['size_unit']}")
         st.write(row["highlights"])
 
-        st.components.v1.html(
-            f"""
-            <blockquote class="instagram-media" data-instgrm-permalink="{row['reel_url']}" data-instgrm-version="14"></blockquote>
-            <script async src="https://www.instagram.com/embed.js"></script>
-            """,
-            height=420
-        )
+        # Only the reel the visitor asked for is embedded, so embed.js loads once per page.
+        if st.session_state.active_reel == row["property_id"]:
+            st.components.v1.html(embed_html(row["reel_url"]), height=EMBED_HEIGHT)
+        else:
+            poster = reel_posters().get(row["reel_url"])
+            if poster:
+                st.image(poster, use_column_width=True)
+            else:
+                st.caption("🎬 Instagram reel")
+            if st.button("▶ Watch reel", key=f"reel_{row['property_id']}"):
+                st.session_state.active_reel = row["property_id"]
+                st.rerun()
 
         if st.button("🔒 Reveal Price", key=f"price_{row['property_id']}"):
-            leads = read_csv_from_github(LEADS_FILE)
-            leads.loc[len(leads)] = [
-                datetime.now(), "Price Reveal", row["property_id"],
-                "", "", "", "", "", "",
-                "Instagram", row["reel_url"], "New", ""
-            ]
-            write_csv_to_github(leads, LEADS_FILE, "Price reveal lead")
+            lead_deduper().submit(
+                (st.session_state.visitor_id, row["property_id"], "Price Reveal"),
+                {
+                    "timestamp": str(datetime.now()),
+                    "lead_type": "Price Reveal",
+                    "property_id": row["property_id"],
+                    "source": "Instagram",
+                    "reel_url": row["reel_url"],
+                    "status": "New",
+                },
+                storage().append_lead,
+            )
             st.success(
                 f"💰 {row['price_value']} {row['price_unit']}"
+                + (f" (≈ {format_inr(row['total_price_inr'])} total)" if pd.notna(row["total_price_inr"]) else "")
                 if pd.notna(row["price_value"])
                 else "💰 Price on request"
             )
             pid = row["property_id"]
             if pid not in st.session_state.favorites:
                 if st.button("⭐ Add to Favorites", key=f"fav_{pid}"):
-                    st.session_state.favorites.append(pid)
+                    st.session_state.favorites.add(pid)
+                    st.query_params["sl"] = st.session_state.favorites.token
                     st.success("Added to favorites")
             else:
                 st.info("⭐ In your favorites")
@@ -231,25 +358,20 @@ for i, row in filtered.iterrows():
         
             if st.button("Confirm Booking", key=f"book_{i}"):
         
-                leads = read_csv_from_github(LEADS_FILE)
-        
-                leads.loc[len(leads)] = [
-                    datetime.now(),
-                    "Booking",
-                    row["property_id"],
-                    name,
-                    phone,
-                    "Visit",
-                    visit,
-                    str(date),
-                    slot,
-                    "Instagram",
-                    row["reel_url"],
-                    "Booked",
-                    ""
-                ]
-        
-                write_csv_to_github(leads, LEADS_FILE, "New booking")
+                storage().append_booking({
+                    "timestamp": str(datetime.now()),
+                    "lead_type": "Booking",
+                    "property_id": row["property_id"],
+                    "name": name,
+                    "phone": phone,
+                    "intent": "Visit",
+                    "visit_type": visit,
+                    "preferred_date": str(date),
+                    "preferred_slot": slot,
+                    "source": "Instagram",
+                    "reel_url": row["reel_url"],
+                    "status": "Booked",
+                })
         
                 message = f"""
         Hello Prasad Realty,
@@ -277,12 +399,20 @@ for i, row in filtered.iterrows():
                     unsafe_allow_html=True
                 )
 
+pager("grid_page", pages)
+
                 
     # ------------------------------------------ Admin Panel ---------------------------------------------------------
 if st.session_state.admin:
     st.divider()
     st.header("🛠 Admin Panel")
 
+    unreadable = store.frame[~store.frame["price_issue"].isin(["", ON_REQUEST])]
+    if len(unreadable):
+        st.warning(f"{len(unreadable)} listing(s) can't be priced or sized; they sort last")
+        st.dataframe(unreadable[["property_id", "title", "price_value", "price_unit", "size_value", "size_unit",
+                                 "price_issue"]], use_container_width=True, hide_index=True)
+
     editable = props.copy()
 
     edited = st.data_editor(
@@ -293,8 +423,30 @@ if st.session_state.admin:
     )
 
     if st.button("Save Property Status"):
-        full = read_csv_from_github(PROPERTIES_FILE)
-        full.update(edited)
-        write_csv_to_github(full, PROPERTIES_FILE, "Update property active status")
-        st.success("Property status updated successfully")
+        # Only rows the admin actually toggled, keyed by property_id.
+        before = dict(zip(editable["property_id"], editable["is_active"].astype(bool)))
+        changes = {
+            pid: bool(active)
+            for pid, active in zip(edited["property_id"], edited["is_active"])
+            if before.get(pid) != bool(active)
+        }
+        if not changes:
+            st.info("No changes to save")
+        elif storage().update_status(changes):
+            st.success(f"Updated {len(changes)} propert{'y' if len(changes) == 1 else 'ies'}")
+        else:
+            st.info("Already up to date")
+
+    st.subheader("📥 Leads export")
+    download_on_demand(
+        "leads", "admin_leads_export", exports(),
+        lambda: storage().iter_leads(),
+        file_stem=f"leads_{datetime.now().strftime('%Y%m%d_%H%M')}",
+        columns=LEAD_COLUMNS,
+        version=storage().leads_version(),
+    )
+
+    if STORAGE_BACKEND == "github":
+        with st.expander("GitHub API latency"):
+            st.dataframe(pd.DataFrame(github_store().client.stats()).T, use_container_width=True)
 
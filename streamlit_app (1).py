@@ -13,8 +13,20 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 from urllib.parse import quote_plus
-import pydeck as pdk
 import streamlit.components.v1 as components
+import numpy as np
+
+from utils.analytics import AnalyticsCollector
+from utils.card_cache import CardCache
+from utils.exports import ExportCache, download_on_demand
+from utils.facets import FacetIndex, to_bits, to_mask
+from utils.geo import GeoIndex, LANDMARKS, parse_point
+from utils.heatmap import heatmap_deck, positions_key
+from utils.images import ImageCache, is_remote
+from utils.inventory import Inventory
+from utils.pagination import current_page, pager
+from utils.range_index import RangeIndex, range_slider
+from utils.shortlist_store import Shortlist, ShortlistStore
 
 # -------------------------------
 # APP SETUP & BRANDING
@@ -29,6 +41,12 @@ BRAND_PRIMARY = "#0A7E8C"  # Teal
 BRAND_ACCENT = "#F5A623"    # Warm accent (orange)
 BRAND_DARK = "#0B2E33"      # Deep teal/dark
 LIGHT_BG = "#F7FAFC"        # Light gray-blue
+PAGE_SIZE = 9               # cards per page (3 rows of 3)
+CUSTOM_POINT = "Custom location…"  # "Near" option that takes a typed lat, lon
+SHORTLIST_DB = "shortlists.db"     # saved shortlists, keyed by the ?sl= token
+APP_URL = ""                        # public URL of the deployed app, for shortlist share links
+ANALYTICS_LOG = "analytics.jsonl"  # per-minute filter-usage rollups, all visitors
+ANALYTICS_WINDOWS = {"Last hour": 3600, "Last 24 hours": 86400, "All time": None}  # minute detail kept for the widest
 
 st.markdown(
     f"""
@@ -45,6 +63,7 @@ st.markdown(
             background: white; border-radius: 16px; box-shadow: 0 4px 18px rgba(0,0,0,0.08);
             overflow: hidden; margin-bottom: 16px; border: 1px solid #e9eef2;
         }}
+        .property-card picture {{ display: block; }}
         .card-image {{ width: 100%; height: 180px; object-fit: cover; display: block; }}
         .card-body {{ padding: 16px 18px; }}
         .badges {{ display: flex; gap: 8px; flex-wrap: wrap; margin-bottom: 8px; }}
@@ -197,23 +216,39 @@ BASE_PROPERTIES = [
     },
 ]
 
+@st.cache_resource
+def inventory():
+    # One columnar copy of the listings per process; sessions only hold row
+    # positions into it. The admin form appends to it for everyone.
+    return Inventory(BASE_PROPERTIES)
+
+# One snapshot for the whole rerun: another session's add swaps in a new
+# store instead of growing this one under our masks.
+store = inventory().current
+
+@st.cache_resource
+def shortlist_store():
+    # One SQLite file holds every session's saved shortlists.
+    return ShortlistStore(SHORTLIST_DB)
+
+@st.cache_resource
+def analytics():
+    # One collector per process; every session's filter clicks land in it.
+    return AnalyticsCollector(ANALYTICS_LOG, retention=max(s for s in ANALYTICS_WINDOWS.values() if s))
+
+@st.cache_resource
+def exports():
+    # Downloads are serialised on request and reused by content hash.
+    return ExportCache()
+
 # -------------------------------
 # SESSION STATE
 # -------------------------------
-if "properties" not in st.session_state:
-    st.session_state.properties = list(BASE_PROPERTIES)
 if "shortlist" not in st.session_state:
-    st.session_state.shortlist = []
+    # Ids only; ?sl=<token> reopens a saved or shared shortlist.
+    st.session_state.shortlist = Shortlist(shortlist_store(), st.query_params.get("sl"))
 if "leads" not in st.session_state:
     st.session_state.leads = []
-if "analytics" not in st.session_state:
-    st.session_state.analytics = {
-        'locality_counts': {},
-        'condition_counts': {},
-        'type_counts': {},
-        'search_terms': {},
-        'sort_counts': {},
-    }
 if "prev_filters" not in st.session_state:
     st.session_state.prev_filters = {
         'localities': None, 'condition': None, 'type': None, 'search': None, 'sort': None
@@ -223,7 +258,7 @@ if "prev_filters" not in st.session_state:
 # SIDEBAR — Filters & Actions
 # -------------------------------
 st.sidebar.title("Filter Properties")
-localities = sorted({p["locality"] for p in st.session_state.properties})
+localities = sorted(store.frame["locality"].cat.categories)
 conditions = ["New", "Old"]
 prop_types = ["Apartment", "Individual House"]
 
@@ -232,17 +267,31 @@ selected_localities = st.sidebar.multiselect(
     options=localities,
     default=localities,
 )
+locality_counts = st.sidebar.empty()
 selected_condition = st.sidebar.radio(
     "Property Condition",
     options=["All"] + conditions,
     index=0,
 )
+condition_counts = st.sidebar.empty()
 selected_type = st.sidebar.radio(
     "Property Type",
     options=["All"] + prop_types,
     index=0,
 )
+type_counts = st.sidebar.empty()
+# Sorted columns + per-row histogram bins, built once per inventory version.
+price_index = store.derived(("range", "price_lakhs"), lambda s: RangeIndex(s.frame["price_lakhs"]))
+size_index = store.derived(("range", "size_sqft"), lambda s: RangeIndex(s.frame["size_sqft"]))
+budget = range_slider(st.sidebar, "Budget (₹ Lakhs)", price_index, step=1.0, format="%.0f")
+budget_hist = st.sidebar.empty()
+size_range = range_slider(st.sidebar, "Size (sqft)", size_index, step=50.0, format="%.0f")
+size_hist = st.sidebar.empty()
 search_text = st.sidebar.text_input("Keyword search", placeholder="e.g., sea view, garden, parking")
+near = st.sidebar.selectbox("Near", ["Anywhere"] + list(LANDMARKS) + [CUSTOM_POINT])
+point_text = st.sidebar.text_input("Location (lat, lon)", placeholder="e.g., 17.7215, 83.3150") if near == CUSTOM_POINT else ""
+radius_km = st.sidebar.slider("Within (km)", 0.5, 20.0, 3.0, 0.5, disabled=near == "Anywhere")
+geo_point = LANDMARKS.get(near) or parse_point(point_text)   # None = no distance filter
 sort_by = st.sidebar.selectbox(
     "Sort by",
     ["Price (low → high)", "Price (high → low)", "Size (small → large)", "Size (large → small)", "Newest Listings"],
@@ -254,21 +303,21 @@ prev = st.session_state.prev_filters
 loc_set = tuple(sorted(selected_localities))
 if prev['localities'] != loc_set:
     for loc in selected_localities:
-        st.session_state.analytics['locality_counts'][loc] = st.session_state.analytics['locality_counts'].get(loc, 0) + 1
+        analytics().record('locality', loc)
     st.session_state.prev_filters['localities'] = loc_set
 if prev['condition'] != selected_condition:
-    st.session_state.analytics['condition_counts'][selected_condition] = st.session_state.analytics['condition_counts'].get(selected_condition, 0) + 1
+    analytics().record('condition', selected_condition)
     st.session_state.prev_filters['condition'] = selected_condition
 if prev['type'] != selected_type:
-    st.session_state.analytics['type_counts'][selected_type] = st.session_state.analytics['type_counts'].get(selected_type, 0) + 1
+    analytics().record('type', selected_type)
     st.session_state.prev_filters['type'] = selected_type
 if prev['search'] != (search_text or ''):
     term = (search_text or '').strip().lower()
     if term:
-        st.session_state.analytics['search_terms'][term] = st.session_state.analytics['search_terms'].get(term, 0) + 1
+        analytics().record('search', term)
     st.session_state.prev_filters['search'] = (search_text or '')
 if prev['sort'] != sort_by:
-    st.session_state.analytics['sort_counts'][sort_by] = st.session_state.analytics['sort_counts'].get(sort_by, 0) + 1
+    analytics().record('sort', sort_by)
     st.session_state.prev_filters['sort'] = sort_by
 
 st.sidebar.markdown("---")
@@ -278,29 +327,62 @@ admin_mode = st.sidebar.checkbox("Admin demo: add a property", value=False)
 # -------------------------------
 # FILTERING
 # -------------------------------
-def apply_filters(data):
-    df = pd.DataFrame(data)
-    df = df[df["locality"].isin(selected_localities)]
-    if selected_condition != "All":
-        df = df[df["condition"] == selected_condition]
-    if selected_type != "All":
-        df = df[df["property_type"] == selected_type]
-    if search_text:
-        s = search_text.strip().lower()
-        df = df[df["title"].str.lower().str.contains(s) | df["desc"].str.lower().str.contains(s)]
-    if sort_by == "Price (low → high)":
-        df = df.sort_values(by="price_lakhs", ascending=True)
-    elif sort_by == "Price (high → low)":
-        df = df.sort_values(by="price_lakhs", ascending=False)
-    elif sort_by == "Size (small → large)":
-        df = df.sort_values(by="size_sqft", ascending=True)
-    elif sort_by == "Size (large → small)":
-        df = df.sort_values(by="size_sqft", ascending=False)
-    elif sort_by == "Newest Listings":
-        df = df.sort_values(by="is_new_listing", ascending=False)
-    return df.to_dict(orient="records")
-
-filtered_props = apply_filters(st.session_state.properties)
+SORT_KEYS = {
+    "Price (low → high)": ("price_lakhs", False),
+    "Price (high → low)": ("price_lakhs", True),
+    "Size (small → large)": ("size_sqft", False),
+    "Size (large → small)": ("size_sqft", True),
+    "Newest Listings": ("is_new_listing", True),
+}
+
+FACET_COLUMNS = ("locality", "condition", "property_type")
+facets = store.derived("facets", lambda s: FacetIndex(s.frame, FACET_COLUMNS))
+selection = {
+    "locality": selected_localities,
+    "condition": None if selected_condition == "All" else selected_condition,
+    "property_type": None if selected_type == "All" else selected_type,
+}
+
+def search_scope(store):
+    """Bitset of rows allowed by the keyword box and the distance radius (every row when unset)."""
+    hits = store.search(search_text) if search_text else None
+    scope = facets.all if hits is None else to_bits(hits)
+    if geo_point is not None:
+        geo = store.derived("geo", lambda s: GeoIndex(s.frame["lat"], s.frame["lon"]))
+        scope &= to_bits(geo.within_radius(*geo_point, radius_km))
+    return scope
+
+def in_ranges(mask):
+    """`mask` narrowed to the budget and size sliders."""
+    if budget is not None:
+        mask = price_index.restrict(mask, *budget)
+    if size_range is not None:
+        mask = size_index.restrict(mask, *size_range)
+    return mask
+
+def apply_filters(store, scope):
+    """Boolean mask over the shared inventory for the current sidebar state."""
+    return in_ranges(to_mask(facets.select(scope, **selection), len(store)))
+
+def page_of(store, mask, page):
+    """Positions for one page of results, in `sort_by` order."""
+    col, descending = SORT_KEYS[sort_by]
+    return store.ordered(mask, col, descending, offset=page * PAGE_SIZE, limit=PAGE_SIZE)
+
+scope = search_scope(store)
+filtered_mask = apply_filters(store, scope)
+filtered_idx = np.flatnonzero(filtered_mask)   # full result set: counts, heatmap
+
+# Live counts under each facet, e.g. "MVP Colony (2)", from the same bitsets.
+# Counts see the search, radius and sliders too, so they add up to the results.
+count_scope = to_bits(in_ranges(to_mask(scope, len(store))))
+locality_counts.caption(facets.caption("locality", selection, count_scope))
+condition_counts.caption(facets.caption("condition", selection, count_scope))
+type_counts.caption(facets.caption("property_type", selection, count_scope))
+# Histograms over the facet/search/radius selection, before the ranges themselves apply.
+in_scope = np.flatnonzero(to_mask(facets.select(scope, **selection), len(store)))
+budget_hist.bar_chart(price_index.histogram(in_scope), height=90)
+size_hist.bar_chart(size_index.histogram(in_scope), height=90)
 
 # -------------------------------
 # ADMIN DEMO — Add property
@@ -328,8 +410,10 @@ if admin_mode:
         if submitted:
             if not new_id or not new_title:
                 st.sidebar.error("Please provide at least an ID and Title.")
+            elif not is_remote(new_img):
+                st.sidebar.error("Image URL must start with http:// or https://.")
             else:
-                st.session_state.properties.append({
+                new_prop = {
                     "id": new_id,
                     "title": new_title,
                     "locality": new_locality,
@@ -347,8 +431,13 @@ if admin_mode:
                     "is_premium": bool(is_premium),
                     "is_new_listing": bool(is_new_list),
                     "family_friendly": bool(family_ok),
-                })
-                st.sidebar.success("Property added to in-memory showcase!")
+                }
+                inventory().add(new_prop)
+                # This rerun's snapshot predates the add; rerun to show the new listing.
+                st.session_state.added_prop = new_id
+                st.rerun()
+    if st.session_state.pop("added_prop", None):
+        st.sidebar.success("Property added to in-memory showcase!")
 
 # -------------------------------
 # HEADER STATS
@@ -358,8 +447,8 @@ with left:
     st.subheader("Find your Vizag home")
     st.write("Use filters to explore properties by area, condition, and type. Add to shortlist and share easily.")
 with right:
-    st.metric("Results", f"{len(filtered_props)} properties")
-    total_premium = sum(1 for p in filtered_props if p.get("is_premium"))
+    st.metric("Results", f"{len(filtered_idx)} properties")
+    total_premium = int(store.flag("is_premium")[filtered_idx].sum())
     st.metric("Premium listings", f"{total_premium}")
 
 # -------------------------------
@@ -367,21 +456,24 @@ with right:
 # -------------------------------
 st.markdown("---")
 st.subheader("Filter Usage Analytics (Prototype)")
-ac = st.session_state.analytics
+window = st.radio("Window", list(ANALYTICS_WINDOWS), index=1, horizontal=True, key="analytics_window")
+since = None if ANALYTICS_WINDOWS[window] is None else datetime.now().timestamp() - ANALYTICS_WINDOWS[window]
+st.caption("All visitors, rolled up per minute; refreshes every few seconds.")
 col_a, col_b = st.columns(2)
 with col_a:
     st.write("**Localities usage**")
-    st.bar_chart(pd.Series(ac['locality_counts']))
+    st.bar_chart(pd.Series(analytics().totals('locality', since), dtype="int64"))
     st.write("**Property type usage**")
-    st.bar_chart(pd.Series(ac['type_counts']))
+    st.bar_chart(pd.Series(analytics().totals('type', since), dtype="int64"))
 with col_b:
     st.write("**Condition usage**")
-    st.bar_chart(pd.Series(ac['condition_counts']))
+    st.bar_chart(pd.Series(analytics().totals('condition', since), dtype="int64"))
     st.write("**Sort choice usage**")
-    st.bar_chart(pd.Series(ac['sort_counts']))
-if ac['search_terms']:
+    st.bar_chart(pd.Series(analytics().totals('sort', since), dtype="int64"))
+search_terms = analytics().totals('search', since)
+if search_terms:
     st.write("**Top search keywords**")
-    df_terms = pd.DataFrame(sorted(ac['search_terms'].items(), key=lambda x: x[1], reverse=True), columns=["term","count"])
+    df_terms = pd.DataFrame(sorted(search_terms.items(), key=lambda x: x[1], reverse=True), columns=["term","count"])
     st.dataframe(df_terms, use_container_width=True)
 else:
     st.caption("No search terms recorded yet.")
@@ -389,24 +481,31 @@ else:
 # -------------------------------
 # MAP — HEATMAP (pydeck)
 # -------------------------------
-if show_map and filtered_props:
-    df_map = pd.DataFrame(filtered_props)[['lat','lon','price_lakhs']].rename(columns={'lat':'latitude','lon':'longitude'})
-    heat_layer = pdk.Layer(
-        'HeatmapLayer',
-        data=df_map,
-        get_position='[longitude, latitude]',
-        aggregation='MEAN',
-        get_weight=1,
-        radiusPixels=40,
-    )
-    view_state = pdk.ViewState(latitude=df_map['latitude'].mean(), longitude=df_map['longitude'].mean(), zoom=12)
-    st.pydeck_chart(pdk.Deck(layers=[heat_layer], initial_view_state=view_state, map_style='light'))
+@st.cache_resource(max_entries=32)
+def heatmap(version, result_key, _store, _positions, radius_pixels=40, aggregation="MEAN"):
+    # Keyed by inventory version + digest of the result set: reruns that don't
+    # change the filters (shortlist clicks, paging) reuse the serialised Deck.
+    cols = _store.frame.iloc[_positions]
+    return heatmap_deck(cols["lat"], cols["lon"], radius_pixels=radius_pixels, aggregation=aggregation)
+
+if show_map and len(filtered_idx):
+    st.pydeck_chart(heatmap(store.version, positions_key(filtered_idx), store, filtered_idx))
 
 # -------------------------------
 # PROPERTY GRID
 # -------------------------------
+@st.cache_resource
+def image_cache():
+    # Resized photo variants on disk, shared by all sessions.
+    return ImageCache()
 
-def render_property_card(prop):
+
+@st.cache_resource
+def card_cache():
+    # Rendered card HTML + download JSON, keyed by (id, inventory version, variant).
+    return CardCache()
+
+def card_html(prop):
     badges_html = "".join([f'<span class="badge {"badge-primary" if t in ["New Listing", "Premium"] else ""}' + f'">{t}</span>' for t in prop.get("tags", [])])
     msg = (
         f"Hello Prasad Reality Vizag, I'm interested in {prop['title']} ({prop['id']}) in {prop['locality']}. Is it available?"
@@ -416,10 +515,9 @@ def render_property_card(prop):
     insta_profile = "https://www.instagram.com/prasad.reality_vizag/"
     insta_dm_app = "instagram://user?username=prasad.reality_vizag"
 
-    st.markdown(
-        f"""
+    return f"""
         <div class="property-card">
-            <img class="card-image" src="{prop['img']}" alt="property image">
+            {image_cache().img_html(prop['img'], css_class="card-image", alt=prop['title'])}
             <div class="card-body">
                 <div class="badges">{badges_html}</div>
                 <div class="price">₹{int(prop['price_lakhs'])} Lakhs</div>
@@ -437,59 +535,81 @@ def render_property_card(prop):
                 </div>
             </div>
         </div>
-        """,
-        unsafe_allow_html=True,
+        """
+
+def render_property_card(prop):
+    # Cards whose photo has cached variants render differently from the plain-URL fallback.
+    variant = "srcset" if image_cache().srcset(prop["img"]) else "plain"
+    card = card_cache().get(
+        (prop["id"], store.version, variant),
+        lambda: {"html": card_html(prop), "json": pd.Series(prop).to_json(indent=2)},
     )
+    st.markdown(card["html"], unsafe_allow_html=True)
 
     c1, c2, c3 = st.columns([1, 1, 2])
     with c1:
         if st.button(f"➕ Shortlist {prop['id']}", key=f"sl_{prop['id']}"):
-            if prop not in st.session_state.shortlist:
-                st.session_state.shortlist.append(prop)
+            if st.session_state.shortlist.add(prop["id"]):
+                st.query_params["sl"] = st.session_state.shortlist.token
                 st.success(f"Added {prop['id']} to shortlist")
             else:
                 st.info("Already in shortlist")
     with c2:
         st.download_button(
             label="⬇️ Download info",
-            data=pd.Series(prop).to_json(indent=2),
+            data=card["json"],
             file_name=f"{prop['id']}.json",
             mime="application/json",
             key=f"dl_{prop['id']}",
         )
 
+# Only the visible page is turned into records and rendered.
+page, pages = current_page(
+    "grid_page", len(filtered_idx), PAGE_SIZE,
+    reset_on=(selection, search_text, budget, size_range, geo_point, radius_km, sort_by, store.version),
+)
+page_props = store.records(page_of(store, filtered_mask, page))
+if st.get_option("server.enableStaticServing"):
+    # Queue card variants for this page in the background; until they exist (or without
+    # static serving) cards keep the original URL.
+    image_cache().prepare([p["img"] for p in page_props])
 cols = st.columns(3)
-for i, prop in enumerate(filtered_props):
+for i, prop in enumerate(page_props):
     with cols[i % 3]:
         render_property_card(prop)
+pager("grid_page", pages)
 
 # -------------------------------
 # SHORTLIST PANEL
 # -------------------------------
 st.markdown("---")
 st.subheader("Your Shortlist")
-if st.session_state.shortlist:
+# Resolved against the shared inventory; ids no longer listed are skipped.
+short_props = store.records(store.positions(st.session_state.shortlist))
+if short_props:
     sh_cols = st.columns(3)
-    for i, prop in enumerate(st.session_state.shortlist):
+    for i, prop in enumerate(short_props):
         with sh_cols[i % 3]:
             st.write(f"**{prop['id']} — {prop['title']}**")
             st.caption(f"{prop['locality']} • ₹{int(prop['price_lakhs'])} Lakhs • {prop['size_sqft']} sqft")
             if st.button(f"Remove {prop['id']}", key=f"rm_{prop['id']}"):
-                st.session_state.shortlist = [p for p in st.session_state.shortlist if p["id"] != prop["id"]]
-                st.experimental_rerun()
-    df_short = pd.DataFrame(st.session_state.shortlist)
-    st.download_button(
-        "⬇️ Download shortlist (CSV)",
-        data=df_short.to_csv(index=False),
-        file_name=f"shortlist_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
-        mime="text/csv",
+                st.session_state.shortlist.remove(prop["id"])
+                st.query_params["sl"] = st.session_state.shortlist.token
+                st.rerun()
+    download_on_demand(
+        "shortlist", "shortlist_export", exports(),
+        lambda: pd.DataFrame(short_props),
+        file_stem=f"shortlist_{datetime.now().strftime('%Y%m%d_%H%M')}",
+        version=(store.version, tuple(st.session_state.shortlist)),
     )
 
     # WhatsApp export of shortlist (India/US)
     lines = []
-    for p in st.session_state.shortlist:
+    for p in short_props:
         lines.append(f"{p['id']} | {p['title']} | {p['locality']} | ₹{int(p['price_lakhs'])} Lakhs | {p['size_sqft']} sqft")
-    msg = "Prasad Reality Vizag — My shortlist:\n" + "\n".join(lines)
+    token = st.session_state.shortlist.token
+    reopen = f"Open it: {APP_URL}?sl={token}" if APP_URL else f"Shortlist code: {token}"
+    msg = "Prasad Reality Vizag — My shortlist:\n" + "\n".join(lines) + "\n" + reopen
     wa_india_all = "https://wa.me/916309729493?text=" + quote_plus(msg)
     wa_us_all = "https://wa.me/17864209015?text=" + quote_plus(msg)
     c_ind, c_us = st.columns(2)
@@ -533,11 +653,11 @@ with st.form("lead_capture_form"):
 if st.session_state.leads:
     df_leads = pd.DataFrame(st.session_state.leads)
     st.dataframe(df_leads, use_container_width=True)
-    st.download_button(
-        "⬇️ Download leads (CSV)",
-        data=df_leads.to_csv(index=False),
-        file_name=f"leads_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
-        mime="text/csv",
+    download_on_demand(
+        "leads", "leads_export", exports(),
+        lambda: df_leads,
+        file_stem=f"leads_{datetime.now().strftime('%Y%m%d_%H%M')}",
+        version=len(st.session_state.leads),
     )
 else:
     st.info("No leads yet. Use the form above to capture inquiries.")
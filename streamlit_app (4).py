@@ -5,8 +5,8 @@ from datetime import datetime
 from urllib.parse import quote_plus
 import pydeck as pdk
 import streamlit.components.v1 as components
-import base64
-import os
+
+from utils.brand_assets import BrandAssets
 
 st.set_page_config(page_title="Prasad Reality Vizag — Property Showcase", page_icon="🏡", layout="wide")
 
@@ -18,15 +18,12 @@ LIGHT_BG      = "#0F172A"  # dark background for contrast (Tailwind slate-900 eq
 TEXT_DARK     = "#0F172A"  # text dark
 TEXT_LIGHT    = "#F8FAFC"  # near-white text
 
-# Auto-load logo from local repo file
-logo_src = None
-for name in ('prasad_logo.png','prasad_logo.jpg','prasad_logo.jpeg'):
-    if os.path.exists(name):
-        with open(name,'rb') as f:
-            b64 = base64.b64encode(f.read()).decode('utf-8')
-        ext = name.split('.')[-1]
-        logo_src = f'data:image/{ext};base64,' + b64
-        break
+# Auto-load logo from local repo file (resized + cached once per process)
+@st.cache_resource
+def brand_assets():
+    return BrandAssets(serve_static=st.get_option("server.enableStaticServing"))
+
+logo_src = brand_assets().logo_src(height=60)
 
 # CSS (escaped braces for f-string)
 st.markdown(
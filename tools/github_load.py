@@ -0,0 +1,75 @@
+# tools/github_load.py — drive GitHubStore + LeadWriter against the stub and report latency
+#
+#   python tools/github_load.py --sessions 20 --reads 50 --leads 5 [--fail-rate 0.05]
+#
+# Starts tools/github_stub.py in-process (or uses --api-root), then each
+# simulated session reads the inventory `--reads` times and submits
+# `--leads` leads, all sharing one store and one writer like app2.py does.
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.github_stub import serve  # noqa: E402
+from utils.github_store import GitHubStore  # noqa: E402
+from utils.lead_writer import LeadWriter  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the GitHub storage path offline")
+    parser.add_argument("--api-root", help="use a running stub instead of starting one")
+    parser.add_argument("--seed", default="data")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--reads", type=int, default=50)
+    parser.add_argument("--leads", type=int, default=5)
+    parser.add_argument("--ttl", type=float, default=1.0)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = None
+    api_root = args.api_root
+    if api_root is None:
+        server = serve(args.seed, port=0, latency_ms=args.latency_ms,
+                       fail_rate=args.fail_rate, rate_limit_rate=args.rate_limit_rate)
+        api_root = f"http://127.0.0.1:{server.server_port}"
+
+    store = GitHubStore("stub/repo", "stub-token", ttl=args.ttl, api_root=api_root)
+    writer = LeadWriter(store, "leads.csv", flush_interval=0.5)
+    before = len(store.read_csv("leads.csv"))
+
+    step = max(args.reads // max(args.leads, 1), 1)
+
+    def session(n):
+        for i in range(args.reads):
+            store.read_csv("properties.csv")
+            if i % step == 0 and i // step < args.leads:
+                writer.submit({"lead_type": "Load test", "name": f"session-{n}", "notes": str(i)})
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(args.sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    while writer.pending():
+        writer.flush()
+    elapsed = time.perf_counter() - started
+
+    written = len(store.read_csv("leads.csv", revalidate=True)) - before
+    print(f"{args.sessions} sessions x {args.reads} reads in {elapsed:.2f}s; "
+          f"{written}/{args.sessions * args.leads} leads committed")
+    print(f"{'route':48} {'count':>6} {'err':>4} {'retry':>5} {'p50ms':>7} {'p95ms':>7} {'maxms':>7}")
+    for route, s in sorted(store.client.stats().items()):
+        print(f"{route:48} {s['count']:>6} {s['errors']:>4} {s['retries']:>5} "
+              f"{s['p50_ms']:>7} {s['p95_ms']:>7} {s['max_ms']:>7}")
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
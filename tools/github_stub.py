@@ -0,0 +1,225 @@
+# tools/github_stub.py — local stand-in for the parts of the GitHub API the app uses
+#
+#   python tools/github_stub.py --seed data --port 8765 [--latency-ms 40] [--fail-rate 0.05]
+#
+# then point the app at it (.streamlit/secrets.toml):
+#
+#   github_api_url = "http://127.0.0.1:8765"
+#
+# Serves one in-memory repo (any owner/name) seeded from --seed under
+# data/: the contents API (file GET/PUT, directory listings with ETags),
+# raw/JSON blobs, and the Git Data calls used for commits (ref, commit,
+# tree). --fail-rate answers that share of requests with 502, and
+# --rate-limit-rate with a secondary-rate-limit 403, to exercise retries.
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+INLINE_LIMIT = 1024 * 1024   # the contents API stops inlining content above this
+
+
+def _sha(kind, data):
+    return hashlib.sha1(b"%s %d\0" % (kind, len(data)) + data).hexdigest()
+
+
+class Repo:
+    """Blobs, trees (flat {path: blob sha}) and commits behind one branch."""
+
+    def __init__(self, branch="main"):
+        self.branch = branch
+        self.blobs = {}
+        self.trees = {}
+        self.commits = {}
+        self.head = None
+        self.lock = threading.Lock()
+
+    def put_blob(self, data):
+        sha = _sha(b"blob", data)
+        self.blobs[sha] = data
+        return sha
+
+    def put_tree(self, entries):
+        sha = _sha(b"tree", json.dumps(sorted(entries.items())).encode())
+        self.trees[sha] = dict(entries)
+        return sha
+
+    def put_commit(self, tree, parents, message):
+        body = json.dumps({"tree": tree, "parents": parents, "message": message, "t": time.time()}).encode()
+        sha = _sha(b"commit", body)
+        self.commits[sha] = {"tree": tree, "parents": parents, "message": message}
+        return sha
+
+    def tree_at(self, ref=None):
+        commit = self.head if ref in (None, self.branch) else ref
+        return self.trees[self.commits[commit]["tree"]]
+
+    def seed(self, directory, prefix="data"):
+        entries = {}
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if os.path.isfile(path):
+                with open(path, "rb") as f:
+                    entries[f"{prefix}/{name}"] = self.put_blob(f.read())
+        self.head = self.put_commit(self.put_tree(entries), [], "Seed")
+
+
+class Handler(BaseHTTPRequestHandler):
+    repo = None
+    latency = 0.0
+    fail_rate = 0.0
+    rate_limit_rate = 0.0
+    protocol_version = "HTTP/1.1"   # keep-alive, like api.github.com
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send(self, status, body=None, headers=None, raw=None):
+        data = raw if raw is not None else (b"" if body is None else json.dumps(body).encode())
+        self.send_response(status)
+        self.send_header("Content-Type", "application/octet-stream" if raw is not None else "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _route(self, method):
+        if self.latency:
+            time.sleep(self.latency)
+        if method != "GET":
+            body = self._body()
+        else:
+            body = None
+        roll = random.random()
+        if roll < self.fail_rate:
+            return self._send(502, {"message": "Server Error (stub)"})
+        if roll < self.fail_rate + self.rate_limit_rate:
+            return self._send(403, {"message": "You have exceeded a secondary rate limit (stub)"}, {"Retry-After": "1"})
+
+        path, _, query = self.path.partition("?")
+        params = dict(p.split("=", 1) for p in query.split("&") if "=" in p)
+        m = re.match(r"^/repos/[^/]+/[^/]+(?:/(.*))?$", path)
+        if not m:
+            return self._send(404, {"message": "Not Found"})
+        rest = m.group(1) or ""
+        repo = self.repo
+        with repo.lock:
+            if rest == "" and method == "GET":
+                return self._send(200, {"default_branch": repo.branch})
+            if rest.startswith("contents/"):
+                return self._contents(method, rest[len("contents/"):].strip("/"), params.get("ref"), body)
+            if rest.startswith("git/blobs/") and method == "GET":
+                data = repo.blobs.get(rest.rsplit("/", 1)[1])
+                if data is None:
+                    return self._send(404, {"message": "Not Found"})
+                if "raw" in (self.headers.get("Accept") or ""):
+                    return self._send(200, raw=data)
+                return self._send(200, {"sha": rest.rsplit("/", 1)[1], "size": len(data), "encoding": "base64",
+                                        "content": base64.b64encode(data).decode()})
+            if rest == f"git/ref/heads/{repo.branch}" and method == "GET":
+                return self._send(200, {"object": {"sha": repo.head, "type": "commit"}})
+            if rest.startswith("git/commits/") and method == "GET":
+                commit = repo.commits.get(rest.rsplit("/", 1)[1])
+                if commit is None:
+                    return self._send(404, {"message": "Not Found"})
+                return self._send(200, {"tree": {"sha": commit["tree"]}, "parents": [{"sha": p} for p in commit["parents"]]})
+            if rest == "git/trees" and method == "POST":
+                entries = dict(repo.trees.get(body.get("base_tree"), {}))
+                for e in body["tree"]:
+                    entries[e["path"]] = repo.put_blob(e["content"].encode()) if "content" in e else e["sha"]
+                return self._send(201, {"sha": repo.put_tree(entries)})
+            if rest == "git/commits" and method == "POST":
+                return self._send(201, {"sha": repo.put_commit(body["tree"], body["parents"], body["message"])})
+            if rest == f"git/refs/heads/{repo.branch}" and method == "PATCH":
+                commit = repo.commits.get(body["sha"])
+                if commit is None or (not body.get("force") and repo.head not in commit["parents"]):
+                    return self._send(422, {"message": "Update is not a fast forward"})
+                repo.head = body["sha"]
+                return self._send(200, {"object": {"sha": repo.head}})
+        return self._send(404, {"message": "Not Found"})
+
+    def _contents(self, method, path, ref, body):
+        repo = self.repo
+        tree = repo.tree_at(ref)
+        if method == "GET" and path in tree:
+            data = repo.blobs[tree[path]]
+            inline = len(data) <= INLINE_LIMIT
+            return self._send(200, {
+                "name": path.rsplit("/", 1)[-1], "path": path, "sha": tree[path], "size": len(data), "type": "file",
+                "encoding": "base64" if inline else "none",
+                "content": base64.b64encode(data).decode() if inline else "",
+            }, {"ETag": f'"{tree[path]}"'})
+        if method == "GET":
+            listing = [
+                {"name": p.rsplit("/", 1)[-1], "path": p, "sha": sha, "size": len(repo.blobs[sha]), "type": "file"}
+                for p, sha in sorted(tree.items()) if p.rsplit("/", 1)[0] == path
+            ]
+            if not listing:
+                return self._send(404, {"message": "Not Found"})
+            etag = '"%s"' % hashlib.sha1(json.dumps(listing).encode()).hexdigest()
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, headers={"ETag": etag})
+            return self._send(200, listing, {"ETag": etag})
+        if method == "PUT":
+            if tree.get(path) != body.get("sha"):
+                return self._send(409, {"message": f"{path} does not match {body.get('sha')}"})
+            entries = dict(tree)
+            entries[path] = repo.put_blob(base64.b64decode(body["content"]))
+            repo.head = repo.put_commit(repo.put_tree(entries), [repo.head], body["message"])
+            return self._send(200, {"content": {"path": path, "sha": entries[path]}, "commit": {"sha": repo.head}})
+        return self._send(405, {"message": "Method Not Allowed"})
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_PUT(self):
+        self._route("PUT")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def do_PATCH(self):
+        self._route("PATCH")
+
+
+def serve(seed="data", host="127.0.0.1", port=8765, latency_ms=0, fail_rate=0.0, rate_limit_rate=0.0):
+    """Start the stub in a background thread; returns the server (call .shutdown())."""
+    repo = Repo()
+    repo.seed(seed)
+    handler = type("StubHandler", (Handler,), {
+        "repo": repo, "latency": latency_ms / 1000, "fail_rate": fail_rate, "rate_limit_rate": rate_limit_rate,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.repo = repo
+    threading.Thread(target=server.serve_forever, name="github-stub", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local GitHub API stub for offline runs")
+    parser.add_argument("--seed", default="data", help="directory whose files become data/<name>")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    server = serve(args.seed, args.host, args.port, args.latency_ms, args.fail_rate, args.rate_limit_rate)
+    print(f"GitHub stub on http://{args.host}:{server.server_port} (seeded from {args.seed}/)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
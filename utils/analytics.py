@@ -0,0 +1,153 @@
+# utils/analytics.py — process-wide filter-usage analytics with per-bucket rollups
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+
+log = logging.getLogger(__name__)
+
+BUCKET_SECONDS = 60
+RETENTION_SECONDS = 24 * 3600   # per-minute detail kept this long, then folded into the archive
+ARCHIVE_TOP = 100               # values kept per kind in the archive (search terms are unbounded)
+ARCHIVE_BUCKET = 0              # older than any `since`, so only all-time totals include it
+
+
+def _line(bucket, kind, value, n):
+    return json.dumps({"bucket": bucket, "kind": kind, "value": value, "n": n}, ensure_ascii=False)
+
+
+class AnalyticsCollector:
+    """Usage counters shared by every visitor, aggregated per time bucket.
+
+    `record()` only appends to a bounded deque (atomic under the GIL, no
+    lock), so request handling never waits on analytics; when the buffer is
+    full the oldest events are dropped rather than blocking. A background
+    thread drains it every `flush_interval` seconds, folds the events into
+    per-bucket counters and appends one JSON line per (bucket, kind, value)
+    to `path`, so the log holds rollups, not raw clicks. On start the log is
+    replayed to rebuild the counters. Readers sum buckets: O(buckets), not
+    O(events).
+
+    Buckets older than `retention` seconds are folded into one archive
+    bucket that keeps only the `archive_top` biggest values per kind, and
+    the log is rewritten to match (at most once per `compact_interval`), so
+    memory and the log stay bounded however long the process runs.
+    """
+
+    def __init__(self, path="analytics.jsonl", bucket_seconds=BUCKET_SECONDS, capacity=10000, flush_interval=2.0,
+                 retention=RETENTION_SECONDS, archive_top=ARCHIVE_TOP, compact_interval=3600):
+        self.path = path
+        self.bucket_seconds = bucket_seconds
+        self.flush_interval = flush_interval
+        self.retention = retention
+        self.archive_top = archive_top
+        self.compact_interval = compact_interval
+        self._compacted = 0.0
+        self._events = deque(maxlen=capacity)
+        self._buckets = {}                    # bucket start (epoch s) -> Counter[(kind, value)]
+        self._flush_lock = threading.Lock()   # one drain at a time (thread, atexit, flush())
+        self._replay()
+        self._compact()
+        self._thread = threading.Thread(target=self._run, name="analytics", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def record(self, kind, value, n=1):
+        """Count one use of `value` for `kind` (e.g. "locality", "MVP Colony")."""
+        self._events.append((time.time(), kind, str(value), n))
+
+    def _bucket(self, ts):
+        return int(ts // self.bucket_seconds * self.bucket_seconds)
+
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                    counter = self._buckets.setdefault(row["bucket"], Counter())
+                    counter[(row["kind"], row["value"])] += row["n"]
+                except (ValueError, KeyError, TypeError):
+                    continue   # a torn last line after a crash
+
+    def flush(self):
+        """Drain buffered events into the rollups and the log. Returns the event count."""
+        with self._flush_lock:
+            drained = Counter()
+            count = 0
+            while True:
+                try:
+                    ts, kind, value, n = self._events.popleft()
+                except IndexError:
+                    break
+                drained[(self._bucket(ts), kind, value)] += n
+                count += 1
+            if time.time() - self._compacted >= self.compact_interval:
+                self._compact()
+            if not drained:
+                return 0
+            lines = []
+            for (bucket, kind, value), n in drained.items():
+                # Replace, don't mutate: readers may be iterating the old Counter.
+                counter = Counter(self._buckets.get(bucket, ()))
+                counter[(kind, value)] += n
+                self._buckets[bucket] = counter
+                lines.append(_line(bucket, kind, value, n))
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+            except OSError:
+                log.exception("Could not append %d analytics rollup(s) to %s", len(lines), self.path)
+            return count
+
+    def _compact(self):
+        """Fold expired buckets into the archive and rewrite the log; caller holds the flush lock."""
+        self._compacted = now = time.time()
+        cutoff = self._bucket(now - self.retention)
+        expired = [b for b in self._buckets if b != ARCHIVE_BUCKET and b < cutoff]
+        if not expired:
+            return
+        archive = Counter(self._buckets.get(ARCHIVE_BUCKET, ()))
+        for bucket in expired:
+            archive.update(self._buckets[bucket])
+        by_kind = {}
+        for (kind, value), n in archive.items():
+            by_kind.setdefault(kind, []).append(((kind, value), n))
+        archive = Counter(dict(
+            item for items in by_kind.values() for item in sorted(items, key=lambda i: -i[1])[:self.archive_top]
+        ))
+        buckets = {b: c for b, c in self._buckets.items() if b != ARCHIVE_BUCKET and b >= cutoff}
+        buckets[ARCHIVE_BUCKET] = archive
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                for bucket, counter in sorted(buckets.items()):
+                    for (kind, value), n in counter.items():
+                        f.write(_line(bucket, kind, value, n) + "\n")
+            os.replace(tmp, self.path)
+        except OSError:
+            log.exception("Could not compact %s", self.path)
+        self._buckets = buckets   # swapped whole: readers may be iterating the old dict
+
+    def totals(self, kind, since=None):
+        """{value: count} for `kind`, summed over buckets (optionally those >= `since`)."""
+        out = Counter()
+        for bucket, counter in list(self._buckets.items()):
+            if since is not None and bucket < since:
+                continue
+            for (k, value), n in counter.items():
+                if k == kind:
+                    out[value] += n
+        return dict(out)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                log.exception("Analytics flush failed")
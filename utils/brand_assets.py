@@ -0,0 +1,83 @@
+# utils/brand_assets.py — resized, memoised brand images (logo) for the headers
+import base64
+import hashlib
+import io
+import os
+import threading
+
+from PIL import Image
+
+LOGO_CANDIDATES = ("prasad_logo.png", "prasad_logo.jpg", "prasad_logo.jpeg")
+HEADER_HEIGHT = 60   # CSS px of .brand-logo
+PIXEL_RATIO = 2      # rendered at 2x so the logo stays sharp on high-DPI screens
+STATIC_DIR = "static"        # Streamlit serves this folder next to the main script ...
+STATIC_URL = "app/static"    # ... at this URL when server.enableStaticServing is on
+
+
+class BrandAssets:
+    """Process-wide cache of header-sized brand images.
+
+    The source file is resized once with Pillow to `height * PIXEL_RATIO`
+    pixels and the result is kept per (path, mtime, height), so replacing the
+    logo file is picked up on the next rerun without a restart. With
+    `serve_static=True` the image is written under `static/brand/` and a short
+    `app/static/...` URL is returned; otherwise a (small) data URI is.
+    """
+
+    def __init__(self, static_dir=STATIC_DIR, static_url=STATIC_URL, serve_static=False):
+        self.static_dir = static_dir
+        self.static_url = static_url
+        self.serve_static = serve_static
+        self._cache = {}    # (path, mtime_ns, height) -> src
+        self._lock = threading.Lock()
+
+    def logo_src(self, candidates=LOGO_CANDIDATES, height=HEADER_HEIGHT):
+        """`src` for the first existing logo in `candidates`, or None."""
+        for path in candidates:
+            if os.path.exists(path):
+                return self.src(path, height)
+        return None
+
+    def src(self, path, height=HEADER_HEIGHT):
+        key = (path, os.stat(path).st_mtime_ns, height)
+        src = self._cache.get(key)
+        if src is None:
+            with self._lock:
+                src = self._cache.get(key)
+                if src is None:
+                    src = self._build(path, height)
+                    # Drop entries for older versions of the same file.
+                    for old in [k for k in self._cache if k[0] == path and k[2] == height]:
+                        del self._cache[old]
+                    self._cache[key] = src
+        return src
+
+    def _build(self, path, height):
+        data, mime, ext = _resize(path, height * PIXEL_RATIO)
+        if not self.serve_static:
+            return f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
+        name = f"{os.path.splitext(os.path.basename(path))[0]}-{height}-{hashlib.sha1(data).hexdigest()[:10]}.{ext}"
+        folder = os.path.join(self.static_dir, "brand")
+        os.makedirs(folder, exist_ok=True)
+        target = os.path.join(folder, name)
+        if not os.path.exists(target):
+            tmp = f"{target}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, target)
+        return f"{self.static_url}/brand/{name}"
+
+
+def _resize(path, pixel_height):
+    """Downscale `path` to `pixel_height` (never upscale); returns (bytes, mime, ext)."""
+    with Image.open(path) as im:
+        im.load()
+        if im.height > pixel_height:
+            width = max(1, round(im.width * pixel_height / im.height))
+            im = im.resize((width, pixel_height), Image.LANCZOS)
+        buf = io.BytesIO()
+        if im.mode in ("RGBA", "LA", "P"):
+            im.save(buf, format="PNG", optimize=True)
+            return buf.getvalue(), "image/png", "png"
+        im.convert("RGB").save(buf, format="JPEG", quality=85, optimize=True)
+        return buf.getvalue(), "image/jpeg", "jpg"
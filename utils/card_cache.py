@@ -0,0 +1,46 @@
+# utils/card_cache.py — process-wide LRU of rendered property-card fragments
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAXSIZE = 2048   # cards; a few KB of HTML each
+
+
+class CardCache:
+    """Least-recently-used cache of rendered card pieces.
+
+    Keys are `(property id, inventory version, variant)`: a card's HTML only
+    depends on its record and the brand constants, so bumping the inventory
+    version (an add/edit) naturally retires stale entries, which then age
+    out.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        """Cached value for `key`, calling `build()` on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        # Build outside the lock; two sessions racing on a miss just build twice.
+        value = build()
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
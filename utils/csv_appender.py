@@ -0,0 +1,156 @@
+# utils/csv_appender.py — O(1) locked appends to CSV logs, with monthly segments
+import csv
+import glob
+import os
+import time
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes: no advisory locks, appends still work
+    fcntl = None
+
+FSYNC_ALWAYS   = "always"    # fsync after every row (default; leads are money)
+FSYNC_INTERVAL = "interval"  # at most once per `fsync_interval` seconds
+FSYNC_NEVER    = "never"     # leave it to the OS
+
+
+class CsvAppender:
+    """Appends rows to `path` without reading it.
+
+    Each append opens the file in append mode under an exclusive `flock`,
+    writes the header only if the file is empty, writes one line and
+    fsyncs according to `fsync`. With `rotate=True` the live file is moved
+    to a `<name>.<YYYY-MM>.csv` segment once its month is over, so the file
+    being appended to never grows past a month of rows.
+
+    `amend()` is the one exception to append-only: it rewrites the live file
+    in place, under the same lock, to change a row that is already there.
+    """
+
+    def __init__(self, path, columns, fsync=FSYNC_ALWAYS, fsync_interval=1.0, rotate=True):
+        self.path = path
+        self.columns = list(columns)
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.rotate = rotate
+        self._last_sync = 0.0
+
+    def append(self, row):
+        line = [row.get(c, "") for c in self.columns]
+        if self.rotate:
+            self.rotate_if_due()
+        while True:
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                _lock(f)
+                try:
+                    # A rotation may have renamed the file between open and lock.
+                    if not _same_file(f, self.path):
+                        continue
+                    if f.seek(0, os.SEEK_END) == 0:
+                        csv.writer(f).writerow(self.columns)
+                    csv.writer(f).writerow(line)
+                    f.flush()
+                    self._sync(f)
+                finally:
+                    _unlock(f)
+            return
+
+    def amend(self, match, changes):
+        """Set `changes` on the live-file rows whose columns equal `match`; returns how many changed.
+
+        O(file), so meant for rare corrections, not per-request writes.
+        Rows already rotated into a segment are left alone.
+        """
+        try:
+            f = open(self.path, "r+", newline="", encoding="utf-8")
+        except FileNotFoundError:
+            return 0
+        with f:
+            _lock(f)
+            try:
+                # A rotation may have renamed the file between open and lock.
+                rows = list(csv.reader(f)) if _same_file(f, self.path) else []
+                if not rows or not set(match) <= set(rows[0]):
+                    return 0
+                col = {c: i for i, c in enumerate(rows[0])}
+                wanted = [(col[c], str(v)) for c, v in match.items()]
+                updates = [(col[c], str(v)) for c, v in changes.items() if c in col]
+                changed = 0
+                for row in rows[1:]:
+                    if all(i < len(row) and row[i] == v for i, v in wanted):
+                        for i, v in updates:
+                            if i < len(row):
+                                row[i] = v
+                        changed += 1
+                if changed:
+                    f.seek(0)
+                    csv.writer(f).writerows(rows)
+                    f.truncate()
+                    f.flush()
+                    self._sync(f)
+                return changed
+            finally:
+                _unlock(f)
+
+    def _sync(self, f):
+        now = time.monotonic()
+        if self.fsync == FSYNC_ALWAYS or (
+            self.fsync == FSYNC_INTERVAL and now - self._last_sync >= self.fsync_interval
+        ):
+            os.fsync(f.fileno())
+            self._last_sync = now
+
+    def segment_path(self, month):
+        root, ext = os.path.splitext(self.path)
+        return f"{root}.{month}{ext or '.csv'}"
+
+    def rotate_if_due(self, now=None):
+        """Move the live file into its month's segment once that month is over."""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return
+        current = (now or datetime.now()).strftime("%Y-%m")
+        if datetime.fromtimestamp(mtime).strftime("%Y-%m") == current:
+            return
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            _lock(f)
+            try:
+                if not _same_file(f, self.path):
+                    return  # someone else rotated it already
+                stat = os.fstat(f.fileno())
+                month = datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m")
+                if stat.st_size == 0 or month == current:
+                    return
+                segment = self.segment_path(month)
+                if os.path.exists(segment):
+                    # Compact into the existing segment rather than clobbering it.
+                    with open(self.path, encoding="utf-8") as src, open(segment, "a", encoding="utf-8") as dst:
+                        next(src, None)
+                        dst.writelines(src)
+                    os.remove(self.path)
+                else:
+                    os.replace(self.path, segment)
+            finally:
+                _unlock(f)
+
+    def segments(self):
+        """Closed monthly segments, oldest first (the live file is not included)."""
+        root, ext = os.path.splitext(self.path)
+        return sorted(glob.glob(f"{glob.escape(root)}.[0-9][0-9][0-9][0-9]-[0-9][0-9]{ext or '.csv'}"))
+
+
+def _lock(f):
+    if fcntl:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+def _unlock(f):
+    if fcntl:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def _same_file(f, path):
+    try:
+        return os.fstat(f.fileno()).st_ino == os.stat(path).st_ino
+    except FileNotFoundError:
+        return False
@@ -0,0 +1,183 @@
+# utils/exports.py — CSV/JSON/XLSX downloads built only when someone asks for them
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import streamlit as st
+
+try:
+    import openpyxl  # noqa: F401  (only needed for XLSX)
+    HAS_XLSX = True
+except ImportError:
+    HAS_XLSX = False
+
+CHUNK_ROWS = 5000
+MIME = {
+    "csv": "text/csv",
+    "json": "application/json",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+FORMATS = ("csv", "json", "xlsx") if HAS_XLSX else ("csv", "json")
+
+
+def content_key(df):
+    """Digest of a frame's columns and values (vectorised row hashes, no serialisation)."""
+    h = hashlib.sha1("\x1f".join(map(str, df.columns)).encode())
+    try:
+        rows = pd.util.hash_pandas_object(df, index=False)
+    except TypeError:   # unhashable cells, e.g. tag lists
+        rows = pd.util.hash_pandas_object(df.astype(str), index=False)
+    h.update(rows.to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _chunks(data, columns=None, rows=CHUNK_ROWS):
+    """Chunks of `data`, all with the same columns (`columns` or the first chunk's)."""
+    if isinstance(data, pd.DataFrame):
+        frame = data
+        data = (frame.iloc[start:start + rows] for start in range(0, max(len(frame), 1), rows))
+    for chunk in data:
+        if columns is None:
+            columns = list(chunk.columns)
+        yield chunk.reindex(columns=columns)
+
+
+def _write_csv(chunks, f):
+    first = True
+    for chunk in chunks:
+        chunk.to_csv(f, header=first, index=False)
+        first = False
+
+
+def _write_json(chunks, f):
+    # One JSON array of records, written chunk by chunk.
+    f.write("[")
+    first = True
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        body = chunk.to_json(orient="records", force_ascii=False)[1:-1]
+        f.write(body if first else "," + body)
+        first = False
+    f.write("]")
+
+
+def _write_xlsx(chunks, path):
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("export")
+    first = True
+    for chunk in chunks:
+        if first:
+            ws.append([str(c) for c in chunk.columns])
+            first = False
+        for row in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False):
+            ws.append(list(row))
+    wb.save(path)
+
+
+class ExportCache:
+    """Serialised exports on disk, keyed by (format, content hash).
+
+    `export()` accepts a DataFrame (hashed with `content_key`, so a repeat
+    request for unchanged data is a dictionary hit) or an iterable of
+    DataFrame chunks, e.g. a lead log read with `chunksize`, which is written
+    chunk by chunk and never held in memory whole; chunked results are
+    de-duplicated by the digest of the written file. Old files are deleted
+    as entries fall out of the LRU.
+    """
+
+    def __init__(self, directory=None, max_entries=32):
+        self.directory = directory or tempfile.mkdtemp(prefix="prasad-exports-")
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # (fmt, digest) -> path
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        with self._lock:
+            path = self._entries.get(key)
+            if path is not None and os.path.exists(path):
+                self._entries.move_to_end(key)
+                return path
+        return None
+
+    def _store(self, key, path):
+        with self._lock:
+            self._entries[key] = path
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                _, old = self._entries.popitem(last=False)
+                if old not in self._entries.values():
+                    try:
+                        os.remove(old)
+                    except OSError:
+                        pass
+
+    def export(self, data, fmt, columns=None):
+        """Path of a file holding `data` as `fmt` ("csv" | "json" | "xlsx").
+
+        Pass `columns` for chunk sources whose chunks may differ in shape
+        (e.g. JSON records of several lead types).
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"unsupported export format: {fmt}")
+        if isinstance(data, pd.DataFrame) and columns is not None:
+            data = data.reindex(columns=columns)
+        key = (fmt, content_key(data)) if isinstance(data, pd.DataFrame) else None
+        if key is not None:
+            path = self._lookup(key)
+            if path is not None:
+                return path
+        fd, tmp = tempfile.mkstemp(suffix=f".{fmt}", dir=self.directory)
+        os.close(fd)
+        if fmt == "xlsx":
+            _write_xlsx(_chunks(data, columns), tmp)
+        else:
+            with open(tmp, "w", newline="", encoding="utf-8") as f:
+                (_write_csv if fmt == "csv" else _write_json)(_chunks(data, columns), f)
+        if key is None:
+            key = (fmt, _file_digest(tmp))
+            existing = self._lookup(key)
+            if existing is not None:
+                os.remove(tmp)
+                return existing
+        path = os.path.join(self.directory, f"{key[1]}.{fmt}")
+        os.replace(tmp, path)
+        self._store(key, path)
+        return path
+
+
+def _file_digest(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def download_on_demand(label, key, exports, data, file_stem, formats=FORMATS, columns=None, version=None):
+    """Format picker + "Prepare" button; the file is only built after a click.
+
+    `data` is a zero-argument callable returning a DataFrame or an iterable of
+    DataFrame chunks. It is only called on the click itself; later reruns
+    reopen the file built then, so unrelated widget clicks serialise nothing.
+    `version` is a cheap token for whatever `data` reads (e.g. the shortlist
+    ids, `StorageBackend.leads_version()`); once it changes the prepared
+    file is dropped and has to be prepared again.
+    """
+    prepared = f"{key}_prepared"   # (fmt, version, path) of the file built on the last click
+    pick, prepare = st.columns([1, 2])
+    fmt = pick.selectbox("Format", formats, key=f"{key}_fmt", label_visibility="collapsed")
+    if prepare.button(f"Prepare {label}", key=f"{key}_prepare"):
+        st.session_state[prepared] = (fmt, version, exports.export(data(), fmt, columns))
+    ready = st.session_state.get(prepared)
+    if ready and ready[1] != version:
+        st.session_state.pop(prepared, None)   # the data changed since Prepare
+        ready = None
+    if ready and ready[0] == fmt and os.path.exists(ready[2]):
+        with open(ready[2], "rb") as f:
+            if st.download_button(f"⬇️ Download {label} ({fmt.upper()})", f, file_name=f"{file_stem}.{fmt}",
+                                  mime=MIME[fmt], key=f"{key}_download"):
+                st.session_state.pop(prepared, None)
@@ -0,0 +1,101 @@
+# utils/geo.py — grid-bucket spatial index for radius / bounding-box filters
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+CELL_DEG = 0.01   # ~1.1 km cells; a 3 km radius touches a handful of cells
+
+# Reference points buyers ask about ("within 3 km of RK Beach").
+LANDMARKS = {
+    "RK Beach": (17.7146, 83.3237),
+    "Rushikonda Beach": (17.7826, 83.3850),
+    "Andhra University": (17.7295, 83.3215),
+    "Visakhapatnam Railway Station": (17.7215, 83.2896),
+    "Jagadamba Junction": (17.7106, 83.2976),
+    "Kailasagiri": (17.7494, 83.3422),
+    "Visakhapatnam Airport": (17.7212, 83.2245),
+}
+
+
+def haversine_km(lat, lon, lat0, lon0):
+    """Great-circle distance in km from (lat0, lon0) to each (lat, lon)."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    lat0, lon0 = math.radians(lat0), math.radians(lon0)
+    a = np.sin((lat - lat0) / 2) ** 2 + np.cos(lat) * math.cos(lat0) * np.sin((lon - lon0) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def parse_point(text):
+    """'17.72, 83.31' -> (17.72, 83.31); None if it isn't a valid coordinate pair."""
+    try:
+        lat, lon = (float(p) for p in text.replace(";", ",").split(","))
+    except (AttributeError, ValueError):
+        return None
+    if -90 <= lat <= 90 and -180 <= lon <= 180:
+        return lat, lon
+    return None
+
+
+class GeoIndex:
+    """Listings bucketed into a lat/lon grid, for sub-millisecond geo filters.
+
+    Each row gets a cell key `row * width + col`; positions are kept sorted by
+    key so every grid row a query touches is one contiguous `searchsorted`
+    slice. Candidates from the touched cells are then checked exactly
+    (haversine for radius, plain comparison for boxes). Rows without
+    coordinates never match. Build it once per inventory version, e.g. via
+    `PropertyStore.derived("geo", ...)`.
+    """
+
+    def __init__(self, lat, lon, cell_deg=CELL_DEG):
+        self.cell_deg = cell_deg
+        self.width = int(math.ceil(360 / cell_deg)) + 1
+        self.lat = np.asarray(lat, dtype="float64")
+        self.lon = np.asarray(lon, dtype="float64")
+        self.n = len(self.lat)
+        valid = np.flatnonzero(~(np.isnan(self.lat) | np.isnan(self.lon)))
+        keys = self._row(self.lat[valid]) * self.width + self._col(self.lon[valid])
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._positions = valid[order]
+
+    def _row(self, lat):
+        return np.floor((np.asarray(lat) + 90) / self.cell_deg).astype("int64")
+
+    def _col(self, lon):
+        return np.floor((np.asarray(lon) + 180) / self.cell_deg).astype("int64")
+
+    def _candidates(self, south, west, north, east):
+        r0, r1 = int(self._row(south)), int(self._row(north))
+        c0, c1 = int(self._col(west)), int(self._col(east))
+        rows = np.arange(r0, r1 + 1, dtype="int64") * self.width
+        starts = np.searchsorted(self._keys, rows + c0, side="left")
+        stops = np.searchsorted(self._keys, rows + c1, side="right")
+        parts = [self._positions[a:b] for a, b in zip(starts, stops) if b > a]
+        return np.concatenate(parts) if parts else np.empty(0, dtype="int64")
+
+    def _mask(self, positions):
+        mask = np.zeros(self.n, dtype=bool)
+        mask[positions] = True
+        return mask
+
+    def within_box(self, south, west, north, east):
+        """Boolean mask of rows inside the bounding box (inclusive)."""
+        cand = self._candidates(south, west, north, east)
+        lat, lon = self.lat[cand], self.lon[cand]
+        return self._mask(cand[(lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)])
+
+    def within_radius(self, lat0, lon0, km):
+        """Boolean mask of rows within `km` (great-circle) of (lat0, lon0)."""
+        dlat = math.degrees(km / EARTH_RADIUS_KM)
+        coslat = max(math.cos(math.radians(min(abs(lat0) + dlat, 89.9))), 1e-6)
+        dlon = min(math.degrees(km / (EARTH_RADIUS_KM * coslat)), 180.0)
+        cand = self._candidates(lat0 - dlat, lon0 - dlon, lat0 + dlat, lon0 + dlon)
+        dist = haversine_km(self.lat[cand], self.lon[cand], lat0, lon0)
+        return self._mask(cand[dist <= km])
+
+    def distances(self, positions, lat0, lon0):
+        """Distance in km from (lat0, lon0) for the given row positions."""
+        positions = np.asarray(positions, dtype="int64")
+        return haversine_km(self.lat[positions], self.lon[positions], lat0, lon0)
@@ -0,0 +1,209 @@
+# utils/github_store.py — GitHub-backed CSV store (Git Data API) with a process-wide cache
+import hashlib
+import threading
+import time
+from contextlib import ExitStack
+
+import pandas as pd
+
+from utils.http_client import HttpClient
+
+API_ROOT = "https://api.github.com"
+DEFAULT_TTL = 60  # seconds the directory listing is trusted before revalidating
+RAW = "application/vnd.github.raw"
+
+
+class GitHubConflict(Exception):
+    """The file changed upstream since the sha a write was based on."""
+
+
+def blob_sha(data):
+    """Git's object id for a blob holding `data` (bytes)."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class GitHubStore:
+    """Reads/writes CSVs under `data_path` of a repo.
+
+    Which revision each file is at comes from one listing of `data_path`
+    (blob shas only, no content), cached for `ttl` seconds and revalidated
+    with `If-None-Match`. Contents are fetched from the blobs endpoint as raw
+    bytes and parsed straight off the stream, so there is no base64 copy and
+    no 1 MB contents-API ceiling; since blobs are content-addressed, a parsed
+    DataFrame stays valid for as long as its sha is current. HTTP goes
+    through one pooled `HttpClient` (timeouts, retries, latency stats); point
+    `api_root` at tools/github_stub.py to run the whole path offline.
+
+    Writes go through the Git Data API: one tree + commit on top of the branch
+    head and a non-forced ref update, so several files can change in a single
+    atomic commit (`commit_files`).
+    """
+
+    def __init__(self, repo, token, data_path="data", ttl=DEFAULT_TTL, branch=None, api_root=API_ROOT, client=None):
+        self.repo = repo
+        self.data_path = data_path
+        self.ttl = ttl
+        self._branch = branch
+        self.client = client or HttpClient(f"{api_root.rstrip('/')}/repos/{repo}", headers={
+            "Authorization": f"token {token}",
+            "Accept": "application/vnd.github.v3+json",
+        })
+        self._listing = None  # {"shas": {file: sha}, "etag", "checked"}
+        self._cache = {}      # file -> {"df", "sha"}
+        self._locks = {}      # file -> lock, so a miss triggers a single fetch
+        self._guard = threading.Lock()
+        self._listing_lock = threading.Lock()
+
+    def _request(self, method, path, **kwargs):
+        return self.client.request(method, path, **kwargs)
+
+    def _json(self, method, path, **kwargs):
+        r = self._request(method, path, **kwargs)
+        r.raise_for_status()
+        return r.json()
+
+    @property
+    def branch(self):
+        if self._branch is None:
+            self._branch = self._json("GET", "")["default_branch"]
+        return self._branch
+
+    def _lock(self, file):
+        with self._guard:
+            return self._locks.setdefault(file, threading.Lock())
+
+    def _shas(self, revalidate=False, ref=None):
+        """{file: blob sha} for `data_path`; `ref` lists a specific commit, uncached."""
+        if ref is not None:
+            body = self._json("GET", f"contents/{self.data_path}", params={"ref": ref})
+            return {item["name"]: item["sha"] for item in body if item["type"] == "file"}
+
+        listing = self._listing
+        if not revalidate and listing and time.monotonic() - listing["checked"] < self.ttl:
+            return listing["shas"]
+        with self._listing_lock:
+            listing = self._listing
+            # Another session may have refreshed the listing while we waited.
+            if not revalidate and listing and time.monotonic() - listing["checked"] < self.ttl:
+                return listing["shas"]
+            headers = {"If-None-Match": listing["etag"]} if listing and listing["etag"] else {}
+            r = self._request("GET", f"contents/{self.data_path}", params={"ref": self.branch}, headers=headers)
+            if r.status_code == 304 and listing:
+                listing["checked"] = time.monotonic()
+            else:
+                r.raise_for_status()
+                listing = {
+                    "shas": {item["name"]: item["sha"] for item in r.json() if item["type"] == "file"},
+                    "etag": r.headers.get("ETag"),
+                    "checked": time.monotonic(),
+                }
+                self._listing = listing
+            return listing["shas"]
+
+    def read_csv(self, file, revalidate=False):
+        """Return a copy of the cached DataFrame for `file`.
+
+        `revalidate=True` skips the TTL and always asks GitHub whether the
+        directory changed (a cheap 304 when it didn't) — use it before
+        read-modify-write.
+        """
+        return self._entry(file, revalidate)["df"].copy()
+
+    def version(self, file):
+        """Blob sha of `file` as of the last (TTL-bounded) listing; no content is fetched."""
+        return self._sha(file)
+
+    def _sha(self, file, revalidate=False):
+        sha = self._shas(revalidate).get(file)
+        if sha is None:
+            raise FileNotFoundError(f"{self.repo}: {self.data_path}/{file} not found on {self.branch}")
+        return sha
+
+    def _entry(self, file, revalidate=False):
+        sha = self._sha(file, revalidate)
+        entry = self._cache.get(file)
+        if entry is not None and entry["sha"] == sha:
+            return entry
+
+        with self._lock(file):
+            entry = self._cache.get(file)
+            if entry is not None and entry["sha"] == sha:
+                return entry
+            # Raw blob, decoded as it streams in.
+            with self._request("GET", f"git/blobs/{sha}", headers={"Accept": RAW}, stream=True) as r:
+                r.raise_for_status()
+                r.raw.decode_content = True
+                df = pd.read_csv(r.raw)
+            entry = {"df": df, "sha": sha}
+            self._cache[file] = entry
+            return entry
+
+    def snapshot(self, file):
+        """Revalidated `(DataFrame copy, blob sha)` to base a write on."""
+        entry = self._entry(file, revalidate=True)
+        return entry["df"].copy(), entry["sha"]
+
+    def write_csv(self, df, file, message, sha=None):
+        """Commit `df` as the new content of `file` (see `commit_files`)."""
+        self.commit_files({file: df}, message, expected={file: sha} if sha else None)
+
+    def commit_files(self, frames, message, expected=None):
+        """Commit several `{file: DataFrame}` as one commit on the branch.
+
+        `expected` maps files to the blob sha the caller read them at; if any
+        of them has moved on at the branch head, or the head itself moves
+        before the ref update lands, `GitHubConflict` is raised so the caller
+        can rebase onto the new content and retry. Nothing is written then.
+        """
+        files = sorted(frames)
+        with ExitStack() as stack:
+            for file in files:
+                stack.enter_context(self._lock(file))
+
+            head = self._json("GET", f"git/ref/heads/{self.branch}")["object"]["sha"]
+            base_tree = self._json("GET", f"git/commits/{head}")["tree"]["sha"]
+            if expected:
+                current = self._shas(ref=head)
+                stale = [f for f, sha in expected.items() if current.get(f) != sha]
+                if stale:
+                    self._forget(stale)
+                    raise GitHubConflict(f"{', '.join(stale)}: changed upstream since read")
+
+            contents = {file: frames[file].to_csv(index=False).encode() for file in files}
+            tree = self._json("POST", "git/trees", json={
+                "base_tree": base_tree,
+                "tree": [
+                    {"path": f"{self.data_path}/{file}", "mode": "100644", "type": "blob",
+                     "content": data.decode()}
+                    for file, data in contents.items()
+                ],
+            })["sha"]
+            commit = self._json("POST", "git/commits", json={"message": message, "tree": tree, "parents": [head]})["sha"]
+            r = self._request("PATCH", f"git/refs/heads/{self.branch}", json={"sha": commit, "force": False})
+            if r.status_code in (409, 422):
+                self._forget(files)
+                raise GitHubConflict(f"{', '.join(files)}: {r.status_code} {r.text[:200]}")
+            r.raise_for_status()
+
+            # Seed the cache with what we just wrote; the next listing
+            # revalidation confirms the new shas without re-downloading.
+            for file, data in contents.items():
+                sha = blob_sha(data)
+                self._cache[file] = {"df": frames[file].copy(), "sha": sha}
+                if self._listing is not None:
+                    self._listing["shas"][file] = sha
+            return commit
+
+    def _forget(self, files):
+        with self._guard:
+            for file in files:
+                self._cache.pop(file, None)
+            self._listing = None
+
+    def invalidate(self, file=None):
+        with self._guard:
+            self._listing = None
+            if file is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(file, None)
@@ -0,0 +1,155 @@
+# utils/http_client.py — pooled HTTP client with timeouts, jittered retries and latency stats
+import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+log = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = (3.05, 20)   # (connect, read) seconds
+RETRY_STATUSES = {500, 502, 503, 504}
+IDEMPOTENT = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+_ID = re.compile(r"/[0-9a-f]{40}\b")
+
+
+def _rate_limited(r):
+    """429, or GitHub's 403 for primary/secondary rate limits."""
+    if r.status_code == 429:
+        return True
+    if r.status_code != 403:
+        return False
+    return r.headers.get("X-RateLimit-Remaining") == "0" or "rate limit" in r.text[:500].lower()
+
+
+def _server_wait(r):
+    """Seconds the server asked us to wait (Retry-After / X-RateLimit-Reset), or None."""
+    retry_after = r.headers.get("Retry-After")
+    reset = r.headers.get("X-RateLimit-Reset")
+    try:
+        if retry_after is not None:
+            return max(float(retry_after), 0)
+        if reset is not None and r.headers.get("X-RateLimit-Remaining") == "0":
+            return max(float(reset) - time.time(), 0)
+    except ValueError:
+        pass
+    return None
+
+
+class HttpClient:
+    """One `requests.Session` shared by every thread, with retries and metrics.
+
+    Connections are pooled per host (`pool_size` kept alive), so repeated
+    calls skip the TCP/TLS handshake. Every request gets `timeout` unless the
+    caller passes one. Connection errors, 5xx and rate-limit answers are
+    retried up to `retries` times with full-jitter exponential backoff,
+    honouring `Retry-After` / `X-RateLimit-Reset` when the server sends them.
+    A server that asks for a longer wait than `max_backoff` (GitHub's primary
+    rate limit resets up to an hour out) gets its answer handed straight back
+    instead of being retried. Non-idempotent methods (POST, PATCH) are only
+    retried when the server certainly didn't act on them: connect failures
+    and rate limits. Latency per route is kept for `stats()`.
+    """
+
+    def __init__(self, base_url="", headers=None, timeout=DEFAULT_TIMEOUT, retries=4,
+                 backoff=0.5, max_backoff=30.0, pool_size=16, samples=500):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.session = requests.Session()
+        self.session.headers.update(headers or {})
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._samples = samples
+        self._metrics = {}   # route -> {"latency": deque, "count", "errors", "retries"}
+        self._lock = threading.Lock()
+
+    def url(self, path):
+        if path.startswith(("http://", "https://")):
+            return path
+        return self.base_url + (f"/{path.lstrip('/')}" if path else "")
+
+    def _delay(self, attempt, r=None):
+        wait = _server_wait(r) if r is not None else None
+        if wait is not None:
+            return min(wait, self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _retryable(self, method, r):
+        if _rate_limited(r):
+            wait = _server_wait(r)
+            return wait is None or wait <= self.max_backoff
+        return r.status_code in RETRY_STATUSES and method in IDEMPOTENT
+
+    def request(self, method, path, route=None, **kwargs):
+        """`Session.request` with the default timeout, retries and timing.
+
+        `route` names the call in `stats()`; by default it is the method and
+        path with 40-hex ids (shas) collapsed.
+        """
+        method = method.upper()
+        url = self.url(path)
+        route = route or f"{method} {_ID.sub('/:sha', url[len(self.base_url):] or '/')}"
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            started = time.perf_counter()
+            try:
+                r = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                self._record(route, time.perf_counter() - started, error=True, retry=not last)
+                # A read timeout may mean the server did act; only replay what is safe to replay.
+                if last or (method not in IDEMPOTENT and not isinstance(exc, requests.ConnectTimeout)
+                            and not _connect_failed(exc)):
+                    raise
+                log.warning("%s failed (%s); retry %d/%d", route, exc.__class__.__name__, attempt + 1, self.retries)
+                time.sleep(self._delay(attempt))
+                continue
+            retry = not last and self._retryable(method, r)
+            self._record(route, time.perf_counter() - started, error=r.status_code >= 500 or _rate_limited(r), retry=retry)
+            if not retry:
+                return r
+            log.warning("%s answered %d; retry %d/%d", route, r.status_code, attempt + 1, self.retries)
+            delay = self._delay(attempt, r)
+            r.close()
+            time.sleep(delay)
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def _record(self, route, seconds, error=False, retry=False):
+        with self._lock:
+            m = self._metrics.get(route)
+            if m is None:
+                m = self._metrics[route] = {"latency": deque(maxlen=self._samples), "count": 0, "errors": 0, "retries": 0}
+            m["latency"].append(seconds)
+            m["count"] += 1
+            m["errors"] += error
+            m["retries"] += retry
+
+    def stats(self):
+        """{route: {count, errors, retries, p50_ms, p95_ms, max_ms}} over recent samples."""
+        out = {}
+        with self._lock:
+            items = [(route, dict(m, latency=sorted(m["latency"]))) for route, m in self._metrics.items()]
+        for route, m in items:
+            lat = m["latency"]
+            pick = lambda q: round(lat[min(len(lat) - 1, int(q * len(lat)))] * 1000, 1) if lat else None
+            out[route] = {
+                "count": m["count"], "errors": m["errors"], "retries": m["retries"],
+                "p50_ms": pick(0.5), "p95_ms": pick(0.95), "max_ms": round(lat[-1] * 1000, 1) if lat else None,
+            }
+        return out
+
+
+def _connect_failed(exc):
+    # requests wraps urllib3's NewConnectionError / MaxRetryError(connect) in ConnectionError.
+    text = str(exc)
+    return "NewConnectionError" in text or "Failed to establish" in text or "Connection refused" in text
@@ -0,0 +1,180 @@
+# utils/images.py — resized, EXIF-stripped listing photos in a content-addressed cache
+import hashlib
+import html
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import requests
+from PIL import Image, ImageOps
+
+CACHE_DIR = "static/img"        # under Streamlit's static folder ...
+CACHE_URL = "app/static/img"    # ... served here with server.enableStaticServing
+VARIANTS = {
+    "card": (400, 800),         # 180–260px tall grid slots, 1x and 2x
+}
+FORMATS = (("webp", "image/webp"), ("jpeg", "image/jpeg"))
+QUALITY = {"webp": 78, "jpeg": 80}
+CARD_SIZES = "(max-width: 640px) 100vw, 33vw"
+FETCH_TIMEOUT = 10
+MAX_SOURCE_BYTES = 15 * 1024 * 1024   # larger downloads are abandoned
+RETRY_AFTER = 15 * 60   # seconds before a failed source is tried again
+
+
+def _render(data, digest, out_dir):
+    """Write every variant of one source image; runs in a worker process."""
+    with Image.open(io.BytesIO(data)) as im:
+        # Bake the EXIF rotation into the pixels; the re-encode drops EXIF itself.
+        im = ImageOps.exif_transpose(im).convert("RGB")
+        for widths in VARIANTS.values():
+            for width in widths:
+                if im.width > width:
+                    scaled = im.resize((width, max(1, round(im.height * width / im.width))), Image.LANCZOS)
+                else:
+                    scaled = im
+                for fmt, _ in FORMATS:
+                    target = os.path.join(out_dir, f"{digest}-{width}.{fmt}")
+                    if os.path.exists(target):
+                        continue
+                    tmp = f"{target}.{os.getpid()}.tmp"
+                    scaled.save(tmp, format=fmt.upper(), quality=QUALITY[fmt], optimize=True)
+                    os.replace(tmp, target)
+    return digest
+
+
+def is_remote(source):
+    """True for http(s) URLs, the only sources safe to take from user input."""
+    return isinstance(source, str) and source.lower().startswith(("http://", "https://"))
+
+
+class ImageCache:
+    """Card-sized variants of listing photos, built once and served statically.
+
+    A source (remote URL or local path such as `assets/<id>_1.jpg`) is read
+    once; its bytes are hashed and every width in `VARIANTS` is written as
+    `<sha1>-<width>.webp|jpeg` under `cache_dir`, so identical photos share
+    files and an edited photo gets new names (safe to cache forever).
+    `prepare()` never blocks the caller: it queues missing sources on a
+    long-lived thread pool, which downloads them and hands the resizing to a
+    long-lived process pool. Until a source is done `img_html()` falls back
+    to the original URL. The source -> digest map is kept in `index.json` so
+    a restart doesn't refetch.
+
+    Remote sources must be http(s), answer with an image, and arrive within
+    `timeout` seconds in total and `max_bytes`. The server does the fetching,
+    so local paths are refused unless `allow_local=True`; only set that when
+    no source can come from user input.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, url_root=CACHE_URL, workers=None, timeout=FETCH_TIMEOUT,
+                 max_bytes=MAX_SOURCE_BYTES, allow_local=False):
+        self.cache_dir = cache_dir
+        self.url_root = url_root
+        self.workers = workers
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.allow_local = allow_local
+        self._index_path = os.path.join(cache_dir, "index.json")
+        self._digests = self._load_index()   # source -> sha1
+        self._failed = {}                    # source -> monotonic time of last failure
+        self._inflight = set()               # sources queued or being built
+        self._lock = threading.Lock()        # guards the three above and the index file
+        self._io = ThreadPoolExecutor(max_workers=8, thread_name_prefix="image-cache")
+        self._render_pool = None             # ProcessPoolExecutor, started on first use
+
+    def _load_index(self):
+        try:
+            with open(self._index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Forget entries whose files were cleaned away.
+        return {src: d for src, d in index.items() if os.path.exists(self._path(d, VARIANTS["card"][0], "jpeg"))}
+
+    def _save_index(self):
+        tmp = f"{self._index_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._digests, f)
+        os.replace(tmp, self._index_path)
+
+    def _path(self, digest, width, fmt):
+        return os.path.join(self.cache_dir, f"{digest}-{width}.{fmt}")
+
+    def _read(self, source):
+        if not is_remote(source):
+            if not self.allow_local:
+                raise ValueError(f"not an http(s) image URL: {source!r}")
+            with open(source, "rb") as f:
+                return f.read()
+        deadline = time.monotonic() + self.timeout
+        with requests.get(source, timeout=self.timeout, stream=True) as resp:
+            resp.raise_for_status()
+            if not resp.headers.get("Content-Type", "").startswith("image/"):
+                raise ValueError(f"{source}: not an image")
+            if int(resp.headers.get("Content-Length") or 0) > self.max_bytes:
+                raise ValueError(f"{source}: larger than {self.max_bytes} bytes")
+            data = bytearray()
+            for chunk in resp.iter_content(64 * 1024):
+                data += chunk
+                if len(data) > self.max_bytes or time.monotonic() > deadline:
+                    raise ValueError(f"{source}: too large or too slow")
+            return bytes(data)
+
+    def _pending(self, sources):
+        now = time.monotonic()
+        return [
+            s for s in dict.fromkeys(sources)
+            if isinstance(s, str) and s and s not in self._digests and s not in self._inflight
+            and now - self._failed.get(s, -RETRY_AFTER) >= RETRY_AFTER
+        ]
+
+    def prepare(self, sources):
+        """Queue variant builds for `sources` (e.g. one page of cards); returns immediately."""
+        if not self._pending(sources):
+            return
+        with self._lock:
+            pending = self._pending(sources)
+            self._inflight.update(pending)
+            if pending and self._render_pool is None:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                self._render_pool = ProcessPoolExecutor(max_workers=self.workers)
+        for source in pending:
+            self._io.submit(self._build, source)
+
+    def _build(self, source):
+        digest = None
+        try:
+            data = self._read(source)
+            digest = self._render_pool.submit(_render, data, hashlib.sha1(data).hexdigest(), self.cache_dir).result()
+        except Exception:   # unreachable, not an image, corrupt file
+            digest = None
+        finally:
+            with self._lock:
+                self._inflight.discard(source)
+                if digest is None:
+                    self._failed[source] = time.monotonic()
+                else:
+                    self._digests[source] = digest
+                    self._save_index()
+
+    def srcset(self, source, variant="card", fmt="jpeg"):
+        """`srcset` string for a prepared source, or None if it isn't cached."""
+        digest = self._digests.get(source)
+        if digest is None:
+            return None
+        return ", ".join(f"{self.url_root}/{digest}-{w}.{fmt} {w}w" for w in VARIANTS[variant])
+
+    def img_html(self, source, variant="card", css_class="", alt="", sizes=CARD_SIZES):
+        """A `<picture>` (WebP + JPEG fallback) for `source`; the original URL if not cached."""
+        attrs = f'class="{css_class}" alt="{html.escape(alt, quote=True)}" loading="lazy" decoding="async"'
+        jpeg = self.srcset(source, variant)
+        if jpeg is None:
+            return f'<img {attrs} src="{html.escape(source or "", quote=True)}">'
+        smallest = f"{self.url_root}/{self._digests[source]}-{VARIANTS[variant][0]}.jpeg"
+        return (
+            f'<picture><source type="image/webp" srcset="{self.srcset(source, variant, "webp")}" sizes="{sizes}">'
+            f'<img {attrs} src="{smallest}" srcset="{jpeg}" sizes="{sizes}"></picture>'
+        )
@@ -0,0 +1,175 @@
+# utils/inventory.py — process-wide columnar property table shared by all sessions
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.search_index import SearchIndex
+
+CATEGORICAL_COLUMNS = ("locality", "property_type", "condition")
+FLOAT32_COLUMNS     = ("price_lakhs", "lat", "lon")
+FLAG_COLUMNS        = ("is_premium", "is_new_listing", "family_friendly")
+
+
+class PropertyStore:
+    """One immutable, columnar snapshot of the inventory.
+
+    Low-cardinality text columns are categoricals, price/coordinates are
+    float32 and boolean flags are packed into a single uint8 `flags` column
+    (bit i = `flags[i]`). Sessions never copy it: filtering yields a mask or
+    an index vector of row positions, and only the rows actually rendered are
+    turned back into dicts via `records()`.
+
+    Nothing on a snapshot changes after construction apart from the lazily
+    built `derived()` structures (search index, facet bitsets, sort
+    orders…), which belong to that snapshot and its `version`. `add()`
+    returns a *new* store, so a session that captured a snapshot at the top
+    of its rerun keeps masks and permutations of one consistent length even
+    while another session adds a listing (see `Inventory`).
+    """
+
+    def __init__(self, records, id_field="id", categorical=CATEGORICAL_COLUMNS, float32=FLOAT32_COLUMNS,
+                 flags=FLAG_COLUMNS, search_fields=("title", "desc"), version=1):
+        self.id_field = id_field
+        self.categorical = tuple(categorical)
+        self.float32 = tuple(float32)
+        self.flags = tuple(flags)
+        self.search_fields = tuple(search_fields)
+        self._records = [dict(r) for r in records]
+        self._frame = self._columnar(self._records)
+        self._positions = {rid: i for i, rid in enumerate(self._frame[id_field])}
+        self._derived = {}
+        self.version = version
+
+    def _columnar(self, records):
+        df = pd.DataFrame(records)
+        for col in self.categorical:
+            if col in df:
+                df[col] = df[col].astype("category")
+        for col in self.float32:
+            if col in df:
+                df[col] = pd.to_numeric(df[col], errors="coerce").astype("float32")
+        bits = np.zeros(len(df), dtype=np.uint8)
+        for bit, col in enumerate(self.flags):
+            if col in df:
+                bits |= df[col].eq(True).to_numpy().astype(np.uint8) << bit
+        df = df.drop(columns=[c for c in self.flags if c in df])
+        df["flags"] = bits
+        return df
+
+    @property
+    def frame(self):
+        """The current snapshot. Treat it as read-only."""
+        return self._frame
+
+    def __len__(self):
+        return len(self._frame)
+
+    def add(self, record):
+        """A new snapshot with `record` appended (version + 1); this one is untouched."""
+        store = PropertyStore(
+            self._records + [dict(record)], self.id_field, self.categorical, self.float32, self.flags,
+            self.search_fields, version=self.version + 1,
+        )
+        search = self._derived.get("search")
+        if search is not None:
+            # The inverted index is append-friendly: extend a copy, don't re-tokenise.
+            index = search[1].copy()
+            index.add(record)
+            store._derived["search"] = (store.version, index)
+        return store
+
+    def derived(self, name, build):
+        """`build(store)` once per inventory version, shared by every session."""
+        entry = self._derived.get(name)
+        if entry is None or entry[0] != self.version:
+            entry = (self.version, build(self))
+            self._derived[name] = entry
+        return entry[1]
+
+    def flag(self, name):
+        """Boolean array for one of the packed flag columns."""
+        bit = self.flags.index(name)
+        return (self._frame["flags"].to_numpy() >> bit & 1).astype(bool)
+
+    def sort_key(self, col):
+        """float64 view of `col` suitable for argsort (flags → 0/1, categoricals → codes)."""
+        if col in self.flags:
+            return self.flag(col).astype("float64")
+        values = self._frame[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            return values.cat.codes.to_numpy().astype("float64")
+        return values.to_numpy(dtype="float64", na_value=np.nan)
+
+    def sort_order(self, col, descending=False):
+        """Row positions ordered by `col`; one stable argsort per inventory version."""
+        def build(store):
+            keys = store.sort_key(col)
+            return np.argsort(-keys if descending else keys, kind="stable")
+        return self.derived(("sort", col, descending), build)
+
+    def ordered(self, mask, col, descending=False, offset=0, limit=None):
+        """Positions where `mask` holds, in `col` order, sliced to [offset, offset+limit).
+
+        Walks the presorted permutation instead of sorting the filtered rows.
+        With a limit the walk goes chunk by chunk and stops as soon as the page
+        is full, so a typical page costs O(page) rather than O(n log n).
+        """
+        perm = self.sort_order(col, descending)
+        if limit is None:
+            return perm[mask[perm]][offset:]
+        need = offset + limit
+        chunk = max(4 * need, 256)
+        found, got = [], 0
+        for start in range(0, len(perm), chunk):
+            part = perm[start:start + chunk]
+            part = part[mask[part]]
+            found.append(part)
+            got += len(part)
+            if got >= need:
+                break
+        if not found:
+            return np.array([], dtype=np.int64)
+        return np.concatenate(found)[offset:need]
+
+    def positions(self, ids):
+        return np.fromiter((self._positions[i] for i in ids if i in self._positions), dtype=np.int64)
+
+    def search(self, query):
+        """Boolean mask of rows matching `query`, or None for an empty query."""
+        index = self.derived("search", lambda s: SearchIndex(s._records, s.search_fields, s.id_field))
+        ids = index.search(query)
+        if ids is None:
+            return None
+        mask = np.zeros(len(self), dtype=bool)
+        mask[self.positions(ids)] = True
+        return mask
+
+    def records(self, positions):
+        """Plain dicts (flags unpacked) for the given row positions, in order."""
+        rows = self._frame.iloc[np.asarray(positions, dtype=np.int64)]
+        out = rows.drop(columns="flags").to_dict(orient="records")
+        bits = rows["flags"].to_numpy()
+        for bit, col in enumerate(self.flags):
+            values = (bits >> bit & 1).astype(bool)
+            for rec, value in zip(out, values):
+                rec[col] = bool(value)
+        return out
+
+
+class Inventory:
+    """The process-wide pointer to the current `PropertyStore` snapshot.
+
+    Reruns read `current` once and work on that snapshot throughout; `add()`
+    builds the next snapshot and swaps the pointer, so readers never see a
+    half-updated table.
+    """
+
+    def __init__(self, records, **options):
+        self._lock = threading.Lock()
+        self.current = PropertyStore(records, **options)
+
+    def add(self, record):
+        with self._lock:
+            self.current = self.current.add(record)
+            return self.current
@@ -0,0 +1,134 @@
+# utils/lead_dedupe.py — suppress repeat leads (same visitor, property, type) in a time window
+import atexit
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+DEFAULT_WINDOW = 10 * 60   # seconds a (session, property, lead type) counts as one lead
+DEFAULT_MAX_KEYS = 20000
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys (double hashing on blake2b)."""
+
+    def __init__(self, bits=1 << 17, hashes=4):
+        self.size = bits
+        self.hashes = hashes
+        self._bits = bytearray(bits // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for p in self._positions(key):
+            self._bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, key):
+        return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+
+class LeadDeduper:
+    """Lets the first lead per key through; counts repeats within `window` seconds.
+
+    Exact entries live in an LRU bounded by `max_keys`. With `bloom=True`
+    every accepted key also goes into a two-generation Bloom filter that is
+    rotated each `window`, so under a burst that evicts LRU entries a repeat
+    is still (approximately) recognised for up to two windows instead of
+    costing another write.
+
+    Repeats cost nothing but a counter bump. Once per lead, when its window
+    closes (or its entry is evicted, or the process exits),
+    `on_repeat(handle, count)` is called with whatever `write()` returned for
+    the first one and the final count, so the caller amends that lead once
+    instead of writing anything per repeat. A background thread checks for
+    closed windows every `sweep_interval` seconds.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, max_keys=DEFAULT_MAX_KEYS, bloom=True, on_repeat=None,
+                 sweep_interval=60):
+        self.window = window
+        self.max_keys = max_keys
+        self.on_repeat = on_repeat
+        self.sweep_interval = sweep_interval
+        self.accepted = 0
+        self.suppressed = 0
+        self._entries = OrderedDict()   # key -> [first_seen, count, handle]; handle is None once reported
+        self._lock = threading.Lock()
+        self._bloom = (BloomFilter(), BloomFilter()) if bloom else None
+        self._rotated = time.monotonic()
+        if on_repeat is not None:
+            self._thread = threading.Thread(target=self._run, name="lead-dedupe", daemon=True)
+            self._thread.start()
+            atexit.register(self.settle, True)
+
+    def _rotate(self, now):
+        if self._bloom is not None and now - self._rotated >= self.window:
+            self._bloom = (BloomFilter(), self._bloom[0])
+            self._rotated = now
+
+    def submit(self, key, row, write):
+        """`write(row)` unless `key` was seen in the window. Returns True if written."""
+        now = time.monotonic()
+        bloom_key = "\x1f".join(map(str, key))
+        with self._lock:
+            self._rotate(now)
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.window:
+                entry[1] += 1
+                self._entries.move_to_end(key)
+                self.suppressed += 1
+                return False
+            if entry is None and self._bloom is not None and any(bloom_key in b for b in self._bloom):
+                self.suppressed += 1
+                return False
+            # An expired entry is about to be replaced; report it first.
+            due = [self._take(entry)] if entry is not None else []
+        self._report(due)
+        handle = write(row)
+        with self._lock:
+            self._entries[key] = [now, 1, handle]
+            self._entries.move_to_end(key)
+            due = []
+            while len(self._entries) > self.max_keys:
+                due.append(self._take(self._entries.popitem(last=False)[1]))
+            if self._bloom is not None:
+                self._bloom[0].add(bloom_key)
+            self.accepted += 1
+        self._report(due)
+        return True
+
+    def settle(self, everything=False):
+        """Report every lead whose window has closed (every open one with `everything`)."""
+        now = time.monotonic()
+        with self._lock:
+            due = [self._take(e) for e in self._entries.values() if everything or now - e[0] >= self.window]
+        self._report(due)
+
+    def _take(self, entry):
+        # (handle, count) to report for `entry`, at most once; caller holds the lock.
+        if entry[1] < 2 or entry[2] is None:
+            return None
+        handle, entry[2] = entry[2], None
+        return handle, entry[1]
+
+    def _report(self, due):
+        if self.on_repeat is None:
+            return
+        for item in due:
+            if item is None:
+                continue
+            try:
+                self.on_repeat(*item)
+            except Exception:
+                log.exception("Could not record %d repeat(s) of a lead", item[1])
+
+    def _run(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            self.settle()
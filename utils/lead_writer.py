@@ -0,0 +1,169 @@
+# utils/lead_writer.py — batched, append-only lead ingest for the GitHub store
+import atexit
+import logging
+import random
+import threading
+import time
+
+import pandas as pd
+
+from utils.github_store import GitHubConflict
+
+log = logging.getLogger(__name__)
+
+LEAD_COLUMNS = [
+    "timestamp", "lead_type", "property_id", "name", "phone", "intent", "visit_type",
+    "preferred_date", "preferred_slot", "source", "reel_url", "status", "notes",
+]
+LEAD_KEY = ("timestamp", "lead_type", "property_id")   # finds a committed row again for amend()
+
+
+class LeadWriter:
+    """Queues lead rows in-process and commits them to `file` in batches.
+
+    A background thread flushes every `flush_interval` seconds, or as soon as
+    `max_batch` rows are waiting. Each flush is one commit: fetch the current
+    file + sha, append every pending row, PUT against that sha. If another
+    writer got there first (409/422) the batch is re-appended onto the fresh
+    content and retried. Rows that still can't be written go back to the
+    front of the queue for the next tick, so nothing is dropped.
+
+    With a `spool` (utils.spool.Spool) every accepted row is also written
+    ahead to local disk before `submit()` returns, and checkpointed once its
+    batch is committed; rows still in the spool when the process starts
+    again are re-queued first, so a restart doesn't lose them either.
+
+    `amend()` changes a submitted row: in place while it is still queued,
+    otherwise as a patch applied (by `key` columns) to the committed row in
+    the next flush's read-modify-write, so it rides along with that commit.
+    """
+
+    def __init__(self, store, file, columns=LEAD_COLUMNS, flush_interval=5.0, max_batch=20, max_retries=5, spool=None,
+                 key=LEAD_KEY):
+        self.store = store
+        self.file = file
+        self.columns = list(columns)
+        self.key = [c for c in key if c in self.columns]
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self.spool = spool
+        self._pending = []
+        self._patches = []                   # {"key": {col: value}, "changes": {col: value}} for committed rows
+        self._lock = threading.Lock()        # guards _pending, _patches (and spool order)
+        self._flush_lock = threading.Lock()  # one commit in flight at a time
+        self._wake = threading.Event()
+        if spool is not None:
+            self._replay()
+        self._thread = threading.Thread(target=self._run, name="lead-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def submit(self, row):
+        """Queue one lead (dict keyed by column name). Returns immediately.
+
+        The returned dict is the queued row itself; pass it to `amend()`.
+        """
+        queued = {c: row.get(c, "") for c in self.columns}
+        with self._lock:
+            # Spooled under the queue lock so spool order == commit order.
+            if self.spool is not None:
+                queued["_seq"] = self.spool.append({"row": {c: queued[c] for c in self.columns}})
+            self._pending.append(queued)
+            full = len(self._pending) >= self.max_batch
+        if full:
+            self._wake.set()
+        return queued
+
+    def amend(self, queued, changes):
+        """Apply `changes` ({column: value}) to a row returned by `submit()`."""
+        changes = {c: v for c, v in changes.items() if c in self.columns}
+        with self._lock:
+            if any(row is queued for row in self._pending):
+                queued.update(changes)
+                if self.spool is not None and "_seq" in queued:
+                    for column, value in changes.items():
+                        self.spool.append({"row_seq": queued["_seq"], "column": column, "value": value})
+                return
+            patch = {"key": {c: queued[c] for c in self.key}, "changes": changes}
+            if self.spool is not None:
+                patch["_seq"] = self.spool.append({"patch": patch})
+            self._patches.append(patch)
+
+    def _replay(self):
+        rows = {}
+        for record in self.spool.pending():
+            if "row" in record:
+                rows[record["seq"]] = {**{c: record["row"].get(c, "") for c in self.columns}, "_seq": record["seq"]}
+            elif "patch" in record:
+                self._patches.append({**record["patch"], "_seq": record["seq"]})
+            elif record.get("row_seq") in rows:
+                rows[record["row_seq"]][record["column"]] = record["value"]
+        if rows or self._patches:
+            log.info("Replaying %d spooled lead(s) and %d amendment(s) into %s", len(rows), len(self._patches), self.file)
+            self._pending.extend(rows.values())
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Commit everything queued so far. Returns the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                patches, self._patches = self._patches, []
+            if not batch and not patches:
+                return 0
+            try:
+                self._commit(batch, patches)
+            except Exception:
+                log.exception("Lead flush failed; %d row(s), %d amendment(s) requeued", len(batch), len(patches))
+                with self._lock:
+                    self._pending[:0] = batch
+                    self._patches[:0] = patches
+                return 0
+            if self.spool is not None:
+                with self._lock:
+                    # Queue drained: trailing amend records are settled too.
+                    done = (
+                        self.spool.last_seq if not self._pending and not self._patches
+                        else max(item.get("_seq", 0) for item in batch + patches)
+                    )
+                self.spool.checkpoint(done)
+            return len(batch)
+
+    def _patched(self, df, patches):
+        for patch in patches:
+            match = pd.Series(True, index=df.index)
+            for col, value in patch["key"].items():
+                match &= (df[col].astype(str) == str(value)) if col in df.columns else False
+            if not match.any():
+                log.warning("Lead %s not found in %s; amendment dropped", patch["key"], self.file)
+                continue
+            for col, value in patch["changes"].items():
+                current = df[col].astype(object) if col in df.columns else pd.Series("", index=df.index, dtype=object)
+                df[col] = current.where(~match, value)
+        return df
+
+    def _commit(self, batch, patches=()):
+        rows = pd.DataFrame(batch, columns=self.columns)
+        parts = ([f"add {len(batch)} lead(s)"] if batch else []) + ([f"update {len(patches)}"] if patches else [])
+        message = ", ".join(parts).capitalize()
+        for attempt in range(self.max_retries):
+            df, sha = self.store.snapshot(self.file)
+            try:
+                # Patched after the append: a requeued batch may hold the very row a patch targets.
+                df = self._patched(pd.concat([df, rows], ignore_index=True), patches)
+                self.store.write_csv(df, self.file, message, sha=sha)
+                return
+            except GitHubConflict:
+                # Someone committed in between: rebase onto their version.
+                time.sleep(random.uniform(0, 0.25 * 2 ** attempt))
+        raise GitHubConflict(f"{self.file}: still conflicting after {self.max_retries} attempts")
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
@@ -0,0 +1,82 @@
+# utils/normalize.py — canonical price / area columns from properties.csv's mixed units
+import numpy as np
+import pandas as pd
+
+SQFT_PER = {"sft": 1.0, "sq ft": 1.0, "sq yards": 9.0, "sq yard": 9.0, "cents": 435.6, "cent": 435.6}
+LAKH = 1e5
+CRORE = 1e7
+
+# price_unit -> (rupees per price_value, sqft the price is quoted per; None = total price)
+PRICE_UNITS = {
+    "per sft": (1.0, 1.0),
+    "per sq yard": (1.0, 9.0),
+    "lakhs per cent": (LAKH, 435.6),
+    "lakhs": (LAKH, None),
+    "crores": (CRORE, None),
+    "inr": (1.0, None),
+}
+
+CANONICAL_COLUMNS = ("total_price_inr", "area_sqft", "price_per_sqft", "price_issue")
+ON_REQUEST = "on request"   # price_issue for listings deliberately quoted "Price on request"
+
+
+def _key(values):
+    return values.astype("string").str.strip().str.lower()
+
+
+def normalize_prices(df, price="price_value", price_unit="price_unit", size="size_value", size_unit="size_unit",
+                     notes="price_notes"):
+    """`df` plus total_price_inr, area_sqft, price_per_sqft and price_issue.
+
+    One vectorised pass: unit strings are mapped to factors with `Series.map`,
+    never parsed per row. Rows whose price or size can't be read get NaN in
+    the affected columns and a short reason in `price_issue` ("" when fine),
+    so they sort last and can be listed for the admin. A blank price whose
+    `notes` say "price on request" is intentional, not a data problem, and
+    gets ON_REQUEST instead of "missing price".
+    """
+    out = df.copy()
+    value = pd.to_numeric(df[price], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    size_value = pd.to_numeric(df[size], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    unit, sunit = _key(df[price_unit]), _key(df[size_unit])
+    on_request = (
+        _key(df[notes]).str.contains("on request", regex=False).fillna(False).to_numpy(dtype=bool)
+        if notes in df.columns else np.zeros(len(df), dtype=bool)
+    )
+
+    rupees = unit.map({k: v[0] for k, v in PRICE_UNITS.items()}).to_numpy(dtype="float64", na_value=np.nan)
+    per_sqft = unit.map({k: v[1] for k, v in PRICE_UNITS.items()}).to_numpy(dtype="float64", na_value=np.nan)
+    is_total = unit.isin([k for k, v in PRICE_UNITS.items() if v[1] is None]).to_numpy()
+    area = size_value * sunit.map(SQFT_PER).to_numpy(dtype="float64", na_value=np.nan)
+    area = np.where(area > 0, area, np.nan)
+
+    quoted = value * rupees
+    rate = np.where(is_total, quoted / area, quoted / per_sqft)
+    total = np.where(is_total, quoted, rate * area)
+
+    out["total_price_inr"] = total
+    out["area_sqft"] = area
+    out["price_per_sqft"] = rate
+    out["price_issue"] = np.select(
+        [
+            np.isnan(value) & on_request,
+            np.isnan(value),
+            np.isnan(rupees),
+            np.isnan(size_value) | (size_value <= 0),
+            np.isnan(area),
+        ],
+        [ON_REQUEST, "missing price", "unknown price unit", "missing size", "unknown size unit"],
+        default="",
+    )
+    return out
+
+
+def format_inr(value):
+    """₹ amount in lakhs / crores for display; "—" when unknown."""
+    if value is None or pd.isna(value):
+        return "—"
+    if value >= CRORE:
+        return f"₹{value / CRORE:.2f} Cr"
+    if value >= LAKH:
+        return f"₹{value / LAKH:.1f} L"
+    return f"₹{value:,.0f}"
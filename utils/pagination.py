@@ -0,0 +1,35 @@
+# utils/pagination.py — page state + Prev/Next controls for the card grids
+import streamlit as st
+
+
+def current_page(key, total, page_size, reset_on):
+    """Return `(page, pages)` for this session; 0-based.
+
+    The page snaps back to 0 whenever `reset_on` (the filter/sort state)
+    changes, and is clamped if the result set shrank underneath it.
+    """
+    state = st.session_state
+    if state.get(f"{key}_reset_on") != reset_on:
+        state[f"{key}_reset_on"] = reset_on
+        state[key] = 0
+    pages = max(1, -(-total // page_size))
+    state[key] = min(state.get(key, 0), pages - 1)
+    return state[key], pages
+
+
+def _move(key, step):
+    st.session_state[key] += step
+
+
+def pager(key, pages):
+    """Prev / "Page x of y" / Next. Buttons act via callbacks, before the rerun."""
+    if pages <= 1:
+        return
+    page = st.session_state[key]
+    col_prev, col_label, col_next = st.columns([1, 2, 1])
+    with col_prev:
+        st.button("◀ Prev", key=f"{key}_prev", disabled=page == 0, on_click=_move, args=(key, -1))
+    with col_label:
+        st.caption(f"Page {page + 1} of {pages}")
+    with col_next:
+        st.button("Next ▶", key=f"{key}_next", disabled=page >= pages - 1, on_click=_move, args=(key, 1))
@@ -0,0 +1,67 @@
+# utils/range_index.py — sorted-array range lookups and histograms for numeric sliders
+import math
+
+import numpy as np
+import pandas as pd
+
+
+class RangeIndex:
+    """One numeric column kept sorted, with the permutation back to row positions.
+
+    `positions(lo, hi)` is two `searchsorted` calls plus a slice, O(log n + k),
+    and `restrict()` intersects that with an existing mask by looking only at
+    those k rows. Every row is also assigned its histogram bin up front, so
+    the counts under a slider are a `bincount` over the rows currently in
+    scope. NaN values (unpriced listings) are left out of the index; callers
+    skip the filter while the slider spans the full range so they stay
+    visible. Built once per inventory version (see PropertyStore.derived).
+    """
+
+    def __init__(self, values, bins=12):
+        values = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        valid = np.flatnonzero(~np.isnan(values))
+        self.n = len(values)
+        self.order = valid[np.argsort(values[valid], kind="stable")]
+        self.sorted = values[self.order]
+        if len(self.sorted):
+            lo, hi = self.sorted[0], self.sorted[-1]
+            self.edges = np.linspace(lo, hi, bins + 1) if hi > lo else np.array([lo, lo + 1.0])
+        else:
+            self.edges = np.array([0.0, 1.0])
+        self.bin_of = np.full(self.n, -1, dtype=np.int64)
+        nbins = len(self.edges) - 1
+        self.bin_of[valid] = np.clip(np.searchsorted(self.edges, values[valid], side="right") - 1, 0, nbins - 1)
+
+    def bounds(self):
+        """(floor(min), ceil(max)) for a slider, or None when fewer than two distinct values."""
+        if not len(self.sorted) or self.sorted[0] == self.sorted[-1]:
+            return None
+        return float(math.floor(self.sorted[0])), float(math.ceil(self.sorted[-1]))
+
+    def positions(self, lo, hi):
+        """Row positions with lo <= value <= hi, in value order."""
+        i = np.searchsorted(self.sorted, lo, side="left")
+        j = np.searchsorted(self.sorted, hi, side="right")
+        return self.order[i:j]
+
+    def restrict(self, mask, lo, hi):
+        """`mask` AND (lo <= value <= hi), touching only the rows inside the range."""
+        hits = self.positions(lo, hi)
+        out = np.zeros(self.n, dtype=bool)
+        out[hits[mask[hits]]] = True
+        return out
+
+    def histogram(self, positions):
+        """Counts per bin for the given row positions, indexed by each bin's lower edge."""
+        bins = self.bin_of[np.asarray(positions, dtype=np.int64)]
+        counts = np.bincount(bins[bins >= 0], minlength=len(self.edges) - 1)
+        return pd.Series(counts, index=np.round(self.edges[:-1], 1))
+
+
+def range_slider(container, label, index, **kwargs):
+    """(lo, hi) picked on a `container.slider` over `index`, or None while it spans everything."""
+    bounds = index.bounds()
+    if bounds is None:
+        return None
+    picked = container.slider(label, bounds[0], bounds[1], bounds, **kwargs)
+    return None if tuple(picked) == bounds else tuple(picked)
@@ -0,0 +1,96 @@
+# utils/reels.py — click-to-load Instagram reels with server-side poster cache
+import html
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+EMBED_SCRIPT = "https://www.instagram.com/embed.js"
+EMBED_HEIGHT = 420
+FETCH_TIMEOUT = 5       # seconds per request to Instagram
+RETRY_AFTER = 15 * 60   # seconds before a failed poster is tried again
+USER_AGENT = "Mozilla/5.0 (compatible; PrasadRealtyBot/1.0)"
+
+_OG_IMAGE = re.compile(
+    r'<meta[^>]+property=["\']og:image["\'][^>]+content=["\']([^"\']+)["\']'
+    r'|<meta[^>]+content=["\']([^"\']+)["\'][^>]+property=["\']og:image["\']',
+    re.IGNORECASE,
+)
+
+
+def embed_html(reel_url):
+    """The full Instagram embed for one reel (blockquote + embed.js)."""
+    permalink = html.escape(reel_url, quote=True)
+    return f"""
+    <blockquote class="instagram-media" data-instgrm-permalink="{permalink}" data-instgrm-version="14"></blockquote>
+    <script async src="{EMBED_SCRIPT}"></script>
+    """
+
+
+class ReelPosters:
+    """Poster thumbnails for reel URLs, fetched once and kept in memory.
+
+    The reel page's `og:image` is downloaded server-side and the image bytes
+    are cached per `reel_url` (Instagram's CDN links are signed and expire, so
+    caching the link alone would go stale). Fetches run on a long-lived
+    background pool: `prefetch()` only queues the misses and `get()` only
+    reads the cache, so a page render never waits on Instagram; cards show a
+    placeholder until their poster lands. Misses are remembered for
+    `retry_after` seconds so an unreachable reel isn't re-queued every rerun.
+    """
+
+    def __init__(self, timeout=FETCH_TIMEOUT, retry_after=RETRY_AFTER, workers=4):
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._cache = {}        # reel_url -> {"image": bytes | None, "checked"}
+        self._inflight = set()  # reel_urls queued or being fetched
+        self._guard = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reel-posters")
+
+    def _cached(self, reel_url):
+        entry = self._cache.get(reel_url)
+        if entry is None:
+            return False
+        return entry["image"] is not None or time.monotonic() - entry["checked"] < self.retry_after
+
+    def get(self, reel_url):
+        """Cached poster bytes for `reel_url`, or None if not (yet) available. Never fetches."""
+        entry = self._cache.get(reel_url) if isinstance(reel_url, str) else None
+        return entry["image"] if entry else None
+
+    def prefetch(self, reel_urls):
+        """Queue background fetches for the reels not cached yet; returns immediately."""
+        with self._guard:
+            missing = [
+                u for u in set(reel_urls)
+                if isinstance(u, str) and u and u not in self._inflight and not self._cached(u)
+            ]
+            self._inflight.update(missing)
+        for reel_url in missing:
+            self._pool.submit(self._load, reel_url)
+
+    def _load(self, reel_url):
+        try:
+            self._cache[reel_url] = {"image": self._fetch(reel_url), "checked": time.monotonic()}
+        finally:
+            with self._guard:
+                self._inflight.discard(reel_url)
+
+    def _fetch(self, reel_url):
+        headers = {"User-Agent": USER_AGENT}
+        try:
+            page = requests.get(reel_url, headers=headers, timeout=self.timeout)
+            if page.status_code != 200:
+                return None
+            match = _OG_IMAGE.search(page.text)
+            if not match:
+                return None
+            image_url = html.unescape(match.group(1) or match.group(2))
+            image = requests.get(image_url, headers=headers, timeout=self.timeout)
+            if image.status_code != 200 or not image.headers.get("Content-Type", "").startswith("image/"):
+                return None
+            return image.content
+        except requests.RequestException:
+            return None
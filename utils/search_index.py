@@ -0,0 +1,76 @@
+# utils/search_index.py — token-level inverted index for the keyword search box
+import bisect
+import re
+import threading
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(str(text).lower())
+
+
+class SearchIndex:
+    """Maps every token in `fields` to the ids of the records containing it.
+
+    Queries are comma-separated alternatives ("sea view, garden, parking"):
+    a record matches an alternative when each of its words is a prefix of
+    some token in the record, so "vast" finds "Vastu". The vocabulary is
+    kept sorted, so a prefix lookup is a bisect plus a short walk instead
+    of a scan over every listing.
+    """
+
+    def __init__(self, records=(), fields=("title", "desc"), id_field="id"):
+        self.fields = tuple(fields)
+        self.id_field = id_field
+        self._postings = {}   # token -> set of record ids
+        self._vocab = []      # sorted tokens
+        self._lock = threading.Lock()
+        for record in records:
+            self.add(record)
+
+    def add(self, record):
+        """Index one record; cheap enough to call straight from an admin form."""
+        rid = record[self.id_field]
+        tokens = {t for f in self.fields for t in tokenize(record.get(f, ""))}
+        with self._lock:
+            for token in tokens:
+                ids = self._postings.get(token)
+                if ids is None:
+                    self._postings[token] = {rid}
+                    bisect.insort(self._vocab, token)
+                else:
+                    ids.add(rid)
+
+    def copy(self):
+        """An independent index with the same postings (cheaper than re-tokenising)."""
+        other = SearchIndex((), self.fields, self.id_field)
+        with self._lock:
+            other._postings = {token: set(ids) for token, ids in self._postings.items()}
+            other._vocab = list(self._vocab)
+        return other
+
+    def _prefix(self, prefix):
+        i = bisect.bisect_left(self._vocab, prefix)
+        ids = set()
+        while i < len(self._vocab) and self._vocab[i].startswith(prefix):
+            ids |= self._postings[self._vocab[i]]
+            i += 1
+        return ids
+
+    def search(self, query):
+        """Ids matching `query`, or None when the query has no words at all."""
+        alternatives = [tokenize(part) for part in str(query).split(",")]
+        alternatives = [words for words in alternatives if words]
+        if not alternatives:
+            return None
+        found = set()
+        with self._lock:
+            for words in alternatives:
+                ids = self._prefix(words[0])
+                for word in words[1:]:
+                    if not ids:
+                        break
+                    ids &= self._prefix(word)
+                found |= ids
+        return found
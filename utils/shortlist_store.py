@@ -0,0 +1,101 @@
+# utils/shortlist_store.py — ID-only shortlists persisted under short share tokens
+import json
+import re
+import secrets
+import time
+
+from utils.sqlite_conn import LocalConnection
+
+TOKEN_BYTES = 6   # -> 8 URL-safe characters, e.g. ?sl=Xk3v_9Qa
+TOKEN_RE = re.compile(r"^[A-Za-z0-9_-]{4,32}$")
+
+SHORTLIST_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shortlists (
+    token   TEXT PRIMARY KEY,
+    ids     TEXT NOT NULL,   -- JSON array of property ids, in the order they were added
+    updated REAL NOT NULL
+);
+"""
+
+
+class ShortlistStore:
+    """Shortlists as ordered lists of property ids in one small SQLite file.
+
+    Only ids are stored; records are resolved against the shared inventory
+    at render time. Each shortlist is keyed by a short random token that
+    goes into the URL (`?sl=`) and the WhatsApp share text, so a shortlist
+    survives reconnects and can be reopened from the message.
+    """
+
+    def __init__(self, path="shortlists.db"):
+        self.path = path
+        self._db = LocalConnection(path)
+        with self._conn() as conn:
+            conn.executescript(SHORTLIST_SCHEMA)
+
+    def _conn(self):
+        return self._db.get()
+
+    def new_token(self):
+        return secrets.token_urlsafe(TOKEN_BYTES)
+
+    def load(self, token):
+        """Ids saved under `token`, or None for an unknown/malformed token."""
+        if not token or not TOKEN_RE.match(token):
+            return None
+        row = self._conn().execute("SELECT ids FROM shortlists WHERE token = ?", (token,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, token, ids):
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO shortlists (token, ids, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(token) DO UPDATE SET ids = excluded.ids, updated = excluded.updated",
+                (token, json.dumps(list(ids)), time.time()),
+            )
+
+
+class Shortlist:
+    """One visitor's shortlist: an insertion-ordered set of property ids.
+
+    Membership checks are dict lookups. The token is only minted (and a row
+    written) on the first change, so browsing without shortlisting costs
+    nothing. A list opened from a `?sl=` token is copy-on-write: that token
+    may be someone else's shared link, so the first change saves under a
+    fresh token and only tokens this session minted are ever written to.
+    """
+
+    def __init__(self, store, token=None):
+        self.store = store
+        saved = store.load(token)
+        self.token = token if saved is not None else None
+        self.owned = False   # True once self.token was minted here
+        self._ids = dict.fromkeys(saved or ())
+
+    def __contains__(self, pid):
+        return pid in self._ids
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, pid):
+        """Add `pid`; returns False if it was already shortlisted."""
+        if pid in self._ids:
+            return False
+        self._ids[pid] = None
+        self._save()
+        return True
+
+    def remove(self, pid):
+        if pid in self._ids:
+            del self._ids[pid]
+            self._save()
+
+    def _save(self):
+        if not self.owned:
+            self.token = self.store.new_token()
+            self.owned = True
+        self.store.save(self.token, self._ids)
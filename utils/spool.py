@@ -0,0 +1,86 @@
+# utils/spool.py — local write-ahead log for rows accepted but not yet persisted upstream
+import json
+import logging
+import os
+import threading
+
+log = logging.getLogger(__name__)
+
+
+class Spool:
+    """Append-only JSONL log of accepted records, with a checkpoint.
+
+    `append()` writes one line and fsyncs it before returning, so a record is
+    durable the moment it is accepted. Each record gets a sequence number;
+    once the consumer has persisted everything up to some `seq` it calls
+    `checkpoint(seq)`, and `pending()` (used on start-up to replay) returns
+    only what came after. When the checkpoint catches up with the last
+    append the log is truncated, so it only ever holds the unsent tail.
+    """
+
+    def __init__(self, path, fsync=True):
+        self.path = path
+        self.checkpoint_path = path + ".ckpt"
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._acked = self._read_checkpoint()
+        records = self._read()
+        self._seq = max([self._acked] + [r["seq"] for r in records])
+
+    def _read_checkpoint(self):
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue   # a torn last line after a crash
+        return records
+
+    def append(self, record):
+        """Durably log `record` (a JSON-able dict). Returns its sequence number."""
+        with self._lock:
+            self._seq += 1
+            line = json.dumps({"seq": self._seq, **record}, ensure_ascii=False, default=str)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            return self._seq
+
+    @property
+    def last_seq(self):
+        return self._seq
+
+    def pending(self):
+        """Records after the checkpoint, oldest first."""
+        with self._lock:
+            return [r for r in self._read() if r["seq"] > self._acked]
+
+    def checkpoint(self, seq):
+        """Mark everything up to `seq` as persisted; compacts the log when fully caught up."""
+        with self._lock:
+            if seq <= self._acked:
+                return
+            tmp = self.checkpoint_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(str(seq))
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            os.replace(tmp, self.checkpoint_path)
+            self._acked = seq
+            if seq >= self._seq and os.path.exists(self.path):
+                # Nothing unsent left; the checkpoint keeps numbering monotonic.
+                with open(self.path, "w", encoding="utf-8"):
+                    pass
@@ -0,0 +1,26 @@
+# utils/sqlite_conn.py — per-thread SQLite connections in WAL mode
+import sqlite3
+import threading
+
+
+class LocalConnection:
+    """One sqlite3 connection to `path` per thread.
+
+    sqlite3 connections can't be shared across threads and Streamlit runs
+    sessions on many, so `get()` lazily opens this thread's connection in
+    WAL mode (readers never block the writer) with synchronous=NORMAL.
+    """
+
+    def __init__(self, path, timeout=10):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def get(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
@@ -0,0 +1,406 @@
+# utils/storage.py — one persistence interface, interchangeable backends
+#
+#   CsvBackend     local CSV files (what version2.py used to do inline)
+#   GitHubBackend  CSVs in this repo via git blobs / the Git Data API (app2.py)
+#   SQLiteBackend  embedded SQLite in WAL mode, indexed for lookups
+#
+# Pick one with get_backend("csv" | "github" | "sqlite", **options).
+import json
+import os
+
+import pandas as pd
+
+from utils.csv_appender import CsvAppender, FSYNC_ALWAYS
+from utils.github_store import GitHubConflict
+from utils.lead_writer import LEAD_KEY
+from utils.sqlite_conn import LocalConnection
+
+
+class StorageBackend:
+    """Read properties, query them, append leads/bookings, flip active status.
+
+    Properties come back as DataFrames; leads and bookings go in as plain
+    dicts keyed by column name. `update_status` takes `{property_id: bool}`
+    so a whole admin save is a single write.
+    """
+
+    id_column = "property_id"
+
+    def read_properties(self):
+        raise NotImplementedError
+
+    def query_properties(self, **filters):
+        """Properties whose columns match `filters` (scalar = equals, list = isin)."""
+        return _filter_frame(self.read_properties(), filters)
+
+    def properties_version(self):
+        """Opaque token that changes whenever the properties change.
+
+        Callers key derived structures (the shared inventory, indexes) on it
+        instead of re-reading and diffing the table every rerun.
+        """
+        raise NotImplementedError
+
+    def leads_version(self):
+        """Opaque token that changes whenever the lead log does (see iter_leads)."""
+        raise NotImplementedError
+
+    def append_lead(self, row):
+        """Persist one lead. Returns a handle to pass to `amend_lead()`."""
+        raise NotImplementedError
+
+    def amend_lead(self, handle, changes):
+        """Update fields ({column: value}) of an already persisted lead in place."""
+        raise NotImplementedError
+
+    def append_booking(self, row):
+        raise NotImplementedError
+
+    def iter_leads(self, chunksize=5000):
+        """The lead log as DataFrame chunks, oldest first (for exports)."""
+        raise NotImplementedError
+
+    def update_status(self, statuses):
+        """Set `is_active` for the given ids; returns how many rows actually changed.
+
+        Only rows whose stored value differs are touched, and nothing is
+        written at all when that leaves no change.
+        """
+        raise NotImplementedError
+
+
+def _filter_frame(df, filters):
+    for col, value in filters.items():
+        if value is None or col not in df.columns:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            df = df[df[col].isin(list(value))]
+        else:
+            df = df[df[col] == value]
+    return df
+
+
+def _apply_status(df, statuses, id_column):
+    """`is_active` patched by id; returns (frame, number of rows changed)."""
+    current = df["is_active"].astype(bool)
+    wanted = df[id_column].map(statuses)
+    patched = wanted.where(wanted.notna(), current).astype(bool)
+    changed = int((patched != current).sum())
+    if changed:
+        df = df.assign(is_active=patched)
+    return df, changed
+
+
+# -----------------------------
+# CSV
+# -----------------------------
+class CsvBackend(StorageBackend):
+    """Leads and bookings are append-only logs (see CsvAppender); the
+    properties file is small and only rewritten by admin status changes."""
+
+    def __init__(self, properties_path=None, leads_path="leads.csv", bookings_path="bookings.csv",
+                 lead_columns=(), booking_columns=(), id_column="property_id",
+                 fsync=FSYNC_ALWAYS, rotate=True):
+        self.properties_path = properties_path
+        self.id_column = id_column
+        self.fsync = fsync
+        self.rotate = rotate
+        self._appenders = {}
+        self.leads_path = leads_path
+        self.bookings_path = bookings_path
+        self.lead_columns = list(lead_columns)
+        self.booking_columns = list(booking_columns)
+
+    def _appender(self, path, columns):
+        # Keyed by path so leads and bookings may share one file (app2 layout).
+        if path not in self._appenders:
+            self._appenders[path] = CsvAppender(path, columns, fsync=self.fsync, rotate=self.rotate)
+        return self._appenders[path]
+
+    def read_properties(self):
+        if not self.properties_path or not os.path.exists(self.properties_path):
+            return pd.DataFrame()
+        return pd.read_csv(self.properties_path)
+
+    def properties_version(self):
+        try:
+            info = os.stat(self.properties_path)
+        except (TypeError, FileNotFoundError):
+            return None
+        return (info.st_mtime_ns, info.st_size)
+
+    def leads_version(self):
+        try:
+            info = os.stat(self.leads_path)
+        except FileNotFoundError:
+            return None
+        return (info.st_mtime_ns, info.st_size)
+
+    def append_lead(self, row):
+        self._appender(self.leads_path, self.lead_columns or list(row)).append(row)
+        return row
+
+    def amend_lead(self, handle, changes):
+        # Found again by its key columns; the live file is rewritten under its lock.
+        match = {c: handle[c] for c in LEAD_KEY if c in handle}
+        if match:
+            self._appender(self.leads_path, self.lead_columns or list(handle)).amend(match, changes)
+
+    def append_booking(self, row):
+        self._appender(self.bookings_path, self.booking_columns or list(row)).append(row)
+
+    def iter_leads(self, chunksize=5000):
+        # Closed monthly segments first, then the live file; read as text so
+        # phone numbers keep their leading zeros / "+".
+        paths = self._appender(self.leads_path, self.lead_columns).segments() + [self.leads_path]
+        for path in paths:
+            if os.path.exists(path) and os.path.getsize(path) > 0:
+                yield from pd.read_csv(path, chunksize=chunksize, dtype=str, keep_default_na=False)
+
+    def update_status(self, statuses):
+        df = self.read_properties()
+        if df.empty or not statuses:
+            return 0
+        df, changed = _apply_status(df, statuses, self.id_column)
+        if changed:
+            df.to_csv(self.properties_path, index=False)
+        return changed
+
+
+# -----------------------------
+# GitHub
+# -----------------------------
+class GitHubBackend(StorageBackend):
+    """CSV files in the repo. Leads and bookings share leads.csv (app2 layout)
+    and go through the batched LeadWriter."""
+
+    def __init__(self, store, lead_writer, properties_file="properties.csv", max_retries=3):
+        self.store = store
+        self.lead_writer = lead_writer
+        self.properties_file = properties_file
+        self.max_retries = max_retries
+
+    def read_properties(self):
+        return self.store.read_csv(self.properties_file)
+
+    def properties_version(self):
+        return self.store.version(self.properties_file)
+
+    def leads_version(self):
+        return self.store.version(self.lead_writer.file)
+
+    def append_lead(self, row):
+        return self.lead_writer.submit(row)
+
+    def amend_lead(self, handle, changes):
+        # Folded into the queued row, or patched onto the committed one in the next batch commit.
+        self.lead_writer.amend(handle, changes)
+
+    def append_booking(self, row):
+        self.lead_writer.submit(row)
+
+    def iter_leads(self, chunksize=5000):
+        # The blob comes back as one whole file; chunking only bounds the export writer.
+        df = self.store.read_csv(self.lead_writer.file)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+
+    def update_status(self, statuses):
+        if not statuses:
+            return 0
+        for _ in range(self.max_retries):
+            # Patch the latest revision by id and PUT against its sha; on a
+            # conflict re-read and re-apply. The store's cache is seeded with
+            # the written frame, so no session re-downloads the file.
+            df, sha = self.store.snapshot(self.properties_file)
+            df, changed = _apply_status(df, statuses, self.id_column)
+            if not changed:
+                return 0
+            message = f"Update active status of {changed} propert{'y' if changed == 1 else 'ies'}"
+            try:
+                self.store.write_csv(df, self.properties_file, message, sha=sha)
+                return changed
+            except GitHubConflict:
+                continue
+        raise GitHubConflict(f"{self.properties_file}: still conflicting after {self.max_retries} attempts")
+
+
+# -----------------------------
+# SQLite
+# -----------------------------
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS properties (
+    property_id TEXT PRIMARY KEY,
+    locality    TEXT,
+    is_active   INTEGER NOT NULL DEFAULT 1,
+    record      TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leads (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp   TEXT,
+    lead_type   TEXT,
+    property_id TEXT,
+    status      TEXT,
+    record      TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bookings (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp   TEXT,
+    property_id TEXT,
+    status      TEXT,
+    record      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_properties_locality  ON properties(locality);
+CREATE INDEX IF NOT EXISTS idx_properties_active    ON properties(is_active);
+CREATE INDEX IF NOT EXISTS idx_leads_property_id    ON leads(property_id);
+CREATE INDEX IF NOT EXISTS idx_leads_status         ON leads(status);
+CREATE INDEX IF NOT EXISTS idx_leads_timestamp      ON leads(timestamp);
+CREATE INDEX IF NOT EXISTS idx_bookings_property_id ON bookings(property_id);
+CREATE INDEX IF NOT EXISTS idx_bookings_status      ON bookings(status);
+CREATE INDEX IF NOT EXISTS idx_bookings_timestamp   ON bookings(timestamp);
+"""
+
+# Filters answered by an index; anything else is applied to the frame after.
+SQLITE_INDEXED = {"property_id", "locality", "is_active"}
+
+
+class SQLiteBackend(StorageBackend):
+    """Each table keeps the indexed fields as real columns and the full
+    record as JSON, so CSVs with different layouts can share one file.
+    Appends are single-row transactions."""
+
+    def __init__(self, path="data/prasad_realty.db", seed_properties=None, id_column="property_id"):
+        self.path = path
+        self.id_column = id_column
+        self._db = LocalConnection(path)
+        with self._conn() as conn:
+            conn.executescript(SQLITE_SCHEMA)
+        if seed_properties and os.path.exists(seed_properties) and self._count("properties") == 0:
+            self.import_properties(pd.read_csv(seed_properties))
+
+    def _conn(self):
+        return self._db.get()
+
+    def _count(self, table):
+        return self._conn().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def _bump_version(self, conn, key="properties_version"):
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, 1) ON CONFLICT(key) DO UPDATE SET value = value + 1",
+            (key,),
+        )
+
+    def _version(self, key):
+        row = self._conn().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def properties_version(self):
+        return self._version("properties_version")
+
+    def leads_version(self):
+        return self._version("leads_version")
+
+    def import_properties(self, df):
+        rows = [
+            (str(r[self.id_column]), r.get("locality"), int(bool(r.get("is_active", True))), json.dumps(r, default=str))
+            for r in df.to_dict(orient="records")
+        ]
+        with self._conn() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO properties (property_id, locality, is_active, record) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._bump_version(conn)
+
+    def _frame(self, records):
+        return pd.DataFrame([json.loads(r) for (r,) in records])
+
+    def read_properties(self):
+        return self._frame(self._conn().execute("SELECT record FROM properties ORDER BY rowid"))
+
+    def query_properties(self, **filters):
+        clauses, params, rest = [], [], {}
+        for col, value in filters.items():
+            if value is None:
+                continue
+            if col not in SQLITE_INDEXED:
+                rest[col] = value
+                continue
+            sql_col = "property_id" if col == self.id_column else col
+            values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+            if col == "is_active":
+                values = [int(bool(v)) for v in values]
+            if not values:
+                return pd.DataFrame()
+            clauses.append(f"{sql_col} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        df = self._frame(self._conn().execute(f"SELECT record FROM properties{where} ORDER BY rowid", params))
+        return _filter_frame(df, rest) if not df.empty else df
+
+    def append_lead(self, row):
+        with self._conn() as conn:
+            lead_id = conn.execute(
+                "INSERT INTO leads (timestamp, lead_type, property_id, status, record) VALUES (?, ?, ?, ?, ?)",
+                (row.get("timestamp"), row.get("lead_type"), row.get("property_id"), row.get("status"),
+                 json.dumps(row, default=str)),
+            ).lastrowid
+            self._bump_version(conn, "leads_version")
+        return lead_id
+
+    def amend_lead(self, handle, changes):
+        with self._conn() as conn:
+            for column, value in changes.items():
+                conn.execute("UPDATE leads SET record = json_set(record, ?, ?) WHERE id = ?",
+                             (f'$."{column}"', value, handle))
+            self._bump_version(conn, "leads_version")
+
+    def append_booking(self, row):
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO bookings (timestamp, property_id, status, record) VALUES (?, ?, ?, ?)",
+                (row.get("timestamp") or row.get("start_dt_ist"), row.get("property_id"), row.get("status"),
+                 json.dumps(row, default=str)),
+            )
+
+    def iter_leads(self, chunksize=5000):
+        cursor = self._conn().execute("SELECT record FROM leads ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(chunksize)
+            if not rows:
+                break
+            yield self._frame(rows)
+
+    def update_status(self, statuses):
+        if not statuses:
+            return 0
+        changed = 0
+        with self._conn() as conn:
+            for pid, active in statuses.items():
+                found = conn.execute(
+                    "SELECT record FROM properties WHERE property_id = ? AND is_active != ?",
+                    (str(pid), int(bool(active))),
+                ).fetchone()
+                if found is None:
+                    continue
+                rec = json.loads(found[0])
+                rec["is_active"] = bool(active)
+                conn.execute(
+                    "UPDATE properties SET is_active = ?, record = ? WHERE property_id = ?",
+                    (int(bool(active)), json.dumps(rec, default=str), str(pid)),
+                )
+                changed += 1
+            if changed:
+                self._bump_version(conn)
+        return changed
+
+
+def get_backend(kind, **options):
+    backends = {"csv": CsvBackend, "github": GitHubBackend, "sqlite": SQLiteBackend}
+    if kind not in backends:
+        raise ValueError(f"Unknown storage backend {kind!r}; expected one of {sorted(backends)}")
+    return backends[kind](**options)
@@ -4,11 +4,22 @@ import os
 from datetime import datetime, timedelta, date, time
 from urllib.parse import quote_plus
 
+import numpy as np
 import pandas as pd
 import streamlit as st
-import pydeck as pdk
 from streamlit.components.v1 import html as st_html
 
+from utils.exports import ExportCache, download_on_demand
+from utils.facets import FacetIndex, to_bits, to_mask
+from utils.geo import GeoIndex, LANDMARKS, parse_point
+from utils.heatmap import heat_weights, heatmap_deck, positions_key
+from utils.images import ImageCache
+from utils.inventory import Inventory
+from utils.pagination import current_page, pager
+from utils.range_index import RangeIndex, range_slider
+from utils.shortlist_store import Shortlist, ShortlistStore
+from utils.storage import get_backend
+
 # -----------------------------
 # App setup
 # -----------------------------
@@ -22,9 +33,18 @@ ENABLE_INSTAGRAM = True     # per-listing "Watch Reel" embed via components.html
 ENABLE_BOOKING   = True
 ENABLE_LEADS     = True
 ENABLE_SHORTLIST = True
+PAGE_SIZE        = 9        # cards per page in the grid
+CUSTOM_POINT     = "Custom location…"  # "Near" option that takes a typed lat, lon
 DATA_DIR         = "."
 LEADS_FILE       = os.path.join(DATA_DIR, "leads.csv")
 BOOKINGS_FILE    = os.path.join(DATA_DIR, "bookings.csv")
+STORAGE_BACKEND  = "csv"    # csv | sqlite
+SQLITE_FILE      = os.path.join(DATA_DIR, "showcase.db")
+SHORTLIST_DB     = os.path.join(DATA_DIR, "shortlists.db")   # saved shortlists, keyed by ?sl=
+LEAD_COLUMNS     = ["timestamp","name","phone","email","preferred_locality","preferred_type","budget_lakhs",
+                    "notes","utm_source","utm_medium","utm_campaign","status"]
+BOOKING_COLUMNS  = ["booking_id","lead_name","lead_phone","property_id","agent_id","agent_name","agent_phone",
+                    "type","start_dt_ist","end_dt_ist","status","notes"]
 
 # -----------------------------
 # Branding / CTAs
@@ -32,6 +52,7 @@ BOOKINGS_FILE    = os.path.join(DATA_DIR, "bookings.csv")
 WA_INDIA_NUM = "916309729493"
 WA_US_NUM    = "17864209015"
 IG_HANDLE    = "prasad.reality_vizag"
+APP_URL      = ""   # public URL of the deployed app, for shortlist share links
 
 # -----------------------------
 # Mock data
@@ -86,10 +107,39 @@ mock_agents = [
 ]
 
 # -----------------------------
-# Session init
+# Shared inventory + session init
 # -----------------------------
-if "properties" not in st.session_state: st.session_state.properties = mock_properties
-if "shortlist"  not in st.session_state: st.session_state.shortlist  = []
+@st.cache_resource
+def inventory():
+    # Columnar, process-wide; sessions keep row positions, not copies.
+    return Inventory(mock_properties)
+
+store = inventory().current   # one snapshot for the whole rerun
+
+@st.cache_resource
+def image_cache():
+    # Resized photo variants on disk, shared by all sessions.
+    return ImageCache()
+
+@st.cache_resource
+def shortlist_store():
+    # One SQLite file holds every session's saved shortlists.
+    return ShortlistStore(SHORTLIST_DB)
+
+@st.cache_resource
+def exports():
+    # Downloads are serialised on request and reused by content hash.
+    return ExportCache()
+
+def remember_shortlist(token):
+    # Put the token in the URL (keeping utm_* etc.) so a reconnect reopens it.
+    params = st.experimental_get_query_params()
+    if params.get("sl", [None])[0] != token:
+        params["sl"] = [token]
+        st.experimental_set_query_params(**params)
+
+# Ids only; ?sl=<token> reopens a saved or shared shortlist.
+if "shortlist"  not in st.session_state: st.session_state.shortlist  = Shortlist(shortlist_store(), st.experimental_get_query_params().get("sl", [None])[0])
 if "leads"      not in st.session_state: st.session_state.leads      = []
 if "bookings"   not in st.session_state: st.session_state.bookings   = []
 if "agents"     not in st.session_state: st.session_state.agents     = mock_agents
@@ -110,18 +160,12 @@ def price_per_sft(price, size):
 def whatsapp_link(number, text):
     return f"https://wa.me/{number}?text=" + quote_plus(text)
 
-def ensure_csv(file_path, columns):
-    if not os.path.exists(file_path):
-        pd.DataFrame(columns=columns).to_csv(file_path, index=False)
-
-def append_row_csv(file_path, row_dict, columns):
-    ensure_csv(file_path, columns)
-    try:
-        df = pd.read_csv(file_path)
-    except Exception:
-        df = pd.DataFrame(columns=columns)
-    df = pd.concat([df, pd.DataFrame([row_dict])], ignore_index=True)
-    df.to_csv(file_path, index=False)
+@st.cache_resource
+def storage():
+    if STORAGE_BACKEND == "sqlite":
+        return get_backend("sqlite", path=SQLITE_FILE, id_column="id")
+    return get_backend("csv", leads_path=LEADS_FILE, bookings_path=BOOKINGS_FILE,
+                       lead_columns=LEAD_COLUMNS, booking_columns=BOOKING_COLUMNS, id_column="id")
 
 def generate_ics(summary, description, start_dt, end_dt, location, organizer_email="info@prasadrealityvizag.demo"):
     """Create a simple ICS invite using IST→UTC conversion."""
@@ -163,7 +207,7 @@ st.caption("Browse, filter, and shortlist properties. Watch reels, enquire on Wh
 wa_hi_india = whatsapp_link(WA_INDIA_NUM, "Hi, I'm browsing the Vizag listings!")
 col_actions = st.columns([1,1,1,3])
 with col_actions[0]:
-    st.metric("Total properties", f"{len(st.session_state.properties)}")
+    st.metric("Total properties", f"{len(store)}")
 with col_actions[1]:
     st.metric("Shortlist", f"{len(st.session_state.shortlist)}")
 with col_actions[2]:
@@ -177,15 +221,28 @@ st.divider()
 # Sidebar filters
 # -----------------------------
 st.sidebar.header("Filter Properties")
-df_all = pd.DataFrame(st.session_state.properties)
-localities = sorted(df_all["locality"].unique().tolist())
+localities = sorted(store.frame["locality"].cat.categories)
 conditions = ["New", "Old"]
 prop_types = ["Apartment", "Individual House", "Plot", "Commercial"]
 
 selected_localities = st.sidebar.multiselect("Area / Locality", options=localities, default=localities)
+locality_counts     = st.sidebar.empty()
 selected_condition  = st.sidebar.radio("Property Condition", options=["All"] + conditions, index=0)
+condition_counts    = st.sidebar.empty()
 selected_type       = st.sidebar.radio("Property Type", options=["All"] + prop_types, index=0)
+type_counts         = st.sidebar.empty()
+# Sorted columns + per-row histogram bins, built once per inventory version; 0 = price on request.
+price_index         = store.derived(("range", "price_lakhs"), lambda s: RangeIndex(s.frame["price_lakhs"].where(s.frame["price_lakhs"] > 0)))
+size_index          = store.derived(("range", "size_sqft"), lambda s: RangeIndex(s.frame["size_sqft"]))
+budget              = range_slider(st.sidebar, "Budget (₹ Lakhs)", price_index, step=1.0, format="%.0f")
+budget_hist         = st.sidebar.empty()
+size_range          = range_slider(st.sidebar, "Size (sqft)", size_index, step=50.0, format="%.0f")
+size_hist           = st.sidebar.empty()
 search_text         = st.sidebar.text_input("Keyword search", placeholder="e.g., sea view, garden, parking, Vastu")
+near                = st.sidebar.selectbox("Near", ["Anywhere"] + list(LANDMARKS) + [CUSTOM_POINT])
+point_text          = st.sidebar.text_input("Location (lat, lon)", placeholder="e.g., 17.7215, 83.3150") if near == CUSTOM_POINT else ""
+radius_km           = st.sidebar.slider("Within (km)", 0.5, 20.0, 3.0, 0.5, disabled=near == "Anywhere")
+geo_point           = LANDMARKS.get(near) or parse_point(point_text)
 sort_by             = st.sidebar.selectbox(
     "Sort by",
     ["Price (low → high)", "Price (high → low)", "Size (small → large)", "Size (large → small)", "Newest Listings"],
@@ -194,33 +251,61 @@ sort_by             = st.sidebar.selectbox(
 st.sidebar.divider()
 show_map = st.sidebar.checkbox("Show heatmap of results", value=ENABLE_HEATMAP)
 
-def apply_filters(data):
-    df = pd.DataFrame(data)
-    if df.empty: return []
-    df = df[df["locality"].isin(selected_localities)]
-    if selected_condition != "All":
-        df = df[df["condition"] == selected_condition]
-    if selected_type != "All":
-        df = df[df["property_type"] == selected_type]
-    if search_text:
-        s = search_text.strip().lower()
-        title = df["title"].astype(str).str.lower()
-        desc  = df["desc"].astype(str).str.lower()
-        df    = df[title.str.contains(s, na=False) | desc.str.contains(s, na=False)]
-    if sort_by == "Price (low → high)":
-        df = df.sort_values(by="price_lakhs", ascending=True)
-    elif sort_by == "Price (high → low)":
-        df = df.sort_values(by="price_lakhs", ascending=False)
-    elif sort_by == "Size (small → large)":
-        df = df.sort_values(by="size_sqft", ascending=True)
-    elif sort_by == "Size (large → small)":
-        df = df.sort_values(by="size_sqft", ascending=False)
-    elif sort_by == "Newest Listings":
-        # demo heuristic
-        df = df.sort_values(by="condition", ascending=False)
-    return df.to_dict(orient="records")
-
-filtered_props = apply_filters(st.session_state.properties)
+SORT_KEYS = {
+    "Price (low → high)":   ("price_lakhs", False),
+    "Price (high → low)":   ("price_lakhs", True),
+    "Size (small → large)": ("size_sqft", False),
+    "Size (large → small)": ("size_sqft", True),
+    "Newest Listings":      ("condition", True),   # demo heuristic
+}
+
+FACET_COLUMNS = ("locality", "condition", "property_type")
+facets    = store.derived("facets", lambda s: FacetIndex(s.frame, FACET_COLUMNS))
+selection = {
+    "locality":      selected_localities,
+    "condition":     None if selected_condition == "All" else selected_condition,
+    "property_type": None if selected_type == "All" else selected_type,
+}
+
+def search_scope(store):
+    """Bitset of rows allowed by the keyword box and the distance radius (every row when unset)."""
+    hits = store.search(search_text) if search_text else None
+    scope = facets.all if hits is None else to_bits(hits)
+    if geo_point is not None:
+        geo = store.derived("geo", lambda s: GeoIndex(s.frame["lat"], s.frame["lon"]))
+        scope &= to_bits(geo.within_radius(*geo_point, radius_km))
+    return scope
+
+def in_ranges(mask):
+    """`mask` narrowed to the budget and size sliders."""
+    if budget is not None:
+        mask = price_index.restrict(mask, *budget)
+    if size_range is not None:
+        mask = size_index.restrict(mask, *size_range)
+    return mask
+
+def apply_filters(store, scope):
+    """Boolean mask over the shared inventory for the current sidebar state."""
+    return in_ranges(to_mask(facets.select(scope, **selection), len(store)))
+
+def page_of(store, mask, page):
+    """Positions for one page of results, in `sort_by` order."""
+    col, descending = SORT_KEYS[sort_by]
+    return store.ordered(mask, col, descending, offset=page * PAGE_SIZE, limit=PAGE_SIZE)
+
+scope          = search_scope(store)
+filtered_mask  = apply_filters(store, scope)
+filtered_idx   = np.flatnonzero(filtered_mask)   # full result set: counts, heatmap
+
+# Counts see the search, radius and sliders too, so they add up to the results.
+count_scope = to_bits(in_ranges(to_mask(scope, len(store))))
+locality_counts.caption(facets.caption("locality", selection, count_scope))
+condition_counts.caption(facets.caption("condition", selection, count_scope))
+type_counts.caption(facets.caption("property_type", selection, count_scope))
+# Histograms over the facet/search/radius selection, before the ranges themselves apply.
+in_scope = np.flatnonzero(to_mask(facets.select(scope, **selection), len(store)))
+budget_hist.bar_chart(price_index.histogram(in_scope), height=90)
+size_hist.bar_chart(size_index.histogram(in_scope), height=90)
 
 # -----------------------------
 # Header stats
@@ -230,20 +315,23 @@ with left:
     st.subheader("Find your Vizag home")
     st.write("Filter by area, type, and condition. Add to shortlist, watch reels, and share instantly via WhatsApp.")
 with right:
-    st.metric("Results", f"{len(filtered_props)}")
-    total_premium = sum(1 for p in filtered_props if "Premium" in p.get("tags", []))
+    st.metric("Results", f"{len(filtered_idx)}")
+    total_premium = int(store.frame["tags"].iloc[filtered_idx].map(lambda t: isinstance(t, list) and "Premium" in t).sum())
     st.metric("Premium-tagged", f"{total_premium}")
 
 # -----------------------------
 # Heatmap (optional)
 # -----------------------------
-if show_map and filtered_props:
-    df_map = pd.DataFrame(filtered_props)[["lat","lon","price_lakhs","size_sqft"]].rename(columns={"lat":"latitude","lon":"longitude"})
-    df_map["weight"] = df_map["price_lakhs"].apply(lambda x: x if x and x > 0 else None)
-    df_map["weight"] = df_map["weight"].fillna(df_map["size_sqft"].where(df_map["size_sqft"] > 0, 1)).fillna(1)
-    layer = pdk.Layer("HeatmapLayer", data=df_map, get_position="[longitude, latitude]", get_weight="weight", radiusPixels=56)
-    view  = pdk.ViewState(latitude=df_map["latitude"].mean(), longitude=df_map["longitude"].mean(), zoom=12)
-    st.pydeck_chart(pdk.Deck(layers=[layer], initial_view_state=view, map_style="light"))
+@st.cache_resource(max_entries=32)
+def heatmap(version, result_key, _store, _positions, radius_pixels=56):
+    # Serialised once per (inventory version, result set, options); weights are
+    # price, else size, else 1, computed on whole columns.
+    cols = _store.frame.iloc[_positions]
+    weight = heat_weights(cols["price_lakhs"], cols["size_sqft"])
+    return heatmap_deck(cols["lat"], cols["lon"], weight, radius_pixels=radius_pixels)
+
+if show_map and len(filtered_idx):
+    st.pydeck_chart(heatmap(store.version, positions_key(filtered_idx), store, filtered_idx))
 
 st.divider()
 
@@ -262,7 +350,11 @@ def render_property_card(prop: dict):
     if ppsf_text and ptype in ("Apartment","Individual House"):
         price_text = f"{price_text} · {ppsf_text}"
 
-    st.image(img, caption=title, use_column_width=True)
+    if st.get_option("server.enableStaticServing"):
+        st.markdown(image_cache().img_html(img, css_class="card-photo", alt=title), unsafe_allow_html=True)
+        st.caption(title)
+    else:
+        st.image(img, caption=title, use_column_width=True)
     tag_line = " · ".join(tags) if tags else ""
     st.caption(f"{locality} • {cond} • {ptype}" + (f" • {tag_line}" if tag_line else ""))
 
@@ -300,8 +392,8 @@ def render_property_card(prop: dict):
     col_actions = st.columns(3)
     with col_actions[0]:
         if ENABLE_SHORTLIST and st.button(f"➕ Shortlist {pid}", key=f"sl_{pid}"):
-            if prop not in st.session_state.shortlist:
-                st.session_state.shortlist.append(prop)
+            if st.session_state.shortlist.add(pid):
+                remember_shortlist(st.session_state.shortlist.token)
                 st.success(f"Added {pid} to shortlist")
             else:
                 st.info("Already in shortlist")
@@ -313,27 +405,40 @@ def render_property_card(prop: dict):
 # -----------------------------
 # Render grid of properties
 # -----------------------------
+page, pages = current_page(
+    "grid_page", len(filtered_idx), PAGE_SIZE,
+    reset_on=(selection, search_text, budget, size_range, geo_point, radius_km, sort_by, store.version),
+)
+page_props = store.records(page_of(store, filtered_mask, page))
+if st.get_option("server.enableStaticServing"):
+    # Queued in the background; photos use the original URL until their variants exist.
+    image_cache().prepare([p.get("img", "") for p in page_props])
+    st.markdown("<style>.card-photo { width: 100%; height: auto; display: block; }</style>", unsafe_allow_html=True)
 cols = st.columns(3)
-for i, prop in enumerate(filtered_props):
+for i, prop in enumerate(page_props):
     with cols[i % 3]:
         render_property_card(prop)
+pager("grid_page", pages)
 
 # -----------------------------
 # Shortlist drawer (simple column)
 # -----------------------------
 st.divider()
 st.subheader("⭐ Shortlist")
-if st.session_state.shortlist:
-    for p in st.session_state.shortlist:
+short_props = store.records(store.positions(st.session_state.shortlist))   # resolved at render time
+if short_props:
+    for p in short_props:
         st.write(f"• **{p.get('id','')}** — {p.get('title','')}")
         st.caption(f"{p.get('locality','')} • {format_price_lakhs(p.get('price_lakhs', 0))}")
-    df_short = pd.DataFrame(st.session_state.shortlist)
-    st.download_button("⬇️ Download shortlist (CSV)", df_short.to_csv(index=False),
-                       file_name=f"shortlist_{datetime.now().strftime('%Y%m%d_%H%M')}.csv", mime="text/csv")
+    download_on_demand("shortlist", "shortlist_export", exports(), lambda: pd.DataFrame(short_props),
+                       file_stem=f"shortlist_{datetime.now().strftime('%Y%m%d_%H%M')}",
+                       version=(store.version, tuple(st.session_state.shortlist)))
     # share via WhatsApp
     lines = [f"{p.get('id','')} | {p.get('title','')} | {p.get('locality','')} | {format_price_lakhs(p.get('price_lakhs', 0))} | {p.get('size_sqft', 0)} sqft"
-             for p in st.session_state.shortlist]
-    msg_all = "Prasad Reality Vizag — My shortlist:\n" + "\n".join(lines)
+             for p in short_props]
+    token   = st.session_state.shortlist.token
+    reopen  = f"Open it: {APP_URL}?sl={token}" if APP_URL else f"Shortlist code: {token}"
+    msg_all = "Prasad Reality Vizag — My shortlist:\n" + "\n".join(lines) + "\n" + reopen
     col_share = st.columns(2)
     with col_share[0]: st.link_button("Share shortlist (India)", whatsapp_link(WA_INDIA_NUM, msg_all), type="primary")
     with col_share[1]: st.link_button("Share shortlist (US)",    whatsapp_link(WA_US_NUM,    msg_all))
@@ -379,10 +484,7 @@ if ENABLE_BOOKING and st.session_state.get("show_booking_modal"):
                         "end_dt_ist": end_dt_ist.strftime("%Y-%m-%d %H:%M"),
                         "status":"scheduled","notes": notes.strip(),
                     }
-                    append_row_csv(BOOKINGS_FILE, row, columns=[
-                        "booking_id","lead_name","lead_phone","property_id","agent_id","agent_name","agent_phone",
-                        "type","start_dt_ist","end_dt_ist","status","notes"
-                    ])
+                    storage().append_booking(row)
                     st.session_state.bookings.append(row)
 
                     # ICS
@@ -441,18 +543,16 @@ if ENABLE_LEADS:
                     "utm_source": utm_source, "utm_medium": utm_medium, "utm_campaign": utm_campaign,
                     "status": "New",
                 }
-                append_row_csv(LEADS_FILE, row, columns=[
-                    "timestamp","name","phone","email","preferred_locality","preferred_type","budget_lakhs",
-                    "notes","utm_source","utm_medium","utm_campaign","status"
-                ])
+                storage().append_lead(row)
                 st.session_state.leads.append(row)
                 st.success("Lead submitted! Our team will reach out shortly.")
 
     if st.session_state.leads:
         df = pd.DataFrame(st.session_state.leads)
         st.dataframe(df, use_container_width=True)
-        st.download_button("⬇️ Download leads (CSV)", df.to_csv(index=False),
-                           file_name=f"leads_{datetime.now().strftime('%Y%m%d_%H%M')}.csv", mime="text/csv")
+        download_on_demand("leads", "leads_export", exports(), lambda: df,
+                           file_stem=f"leads_{datetime.now().strftime('%Y%m%d_%H%M')}",
+                           version=len(st.session_state.leads))
     else:
         st.info("No leads yet. Use the form above to capture inquiries.")
 
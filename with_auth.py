@@ -1,13 +1,13 @@
 
 # streamlit_app.py — Public showcase, premium UI, no login, all HTML entity fixes applied
-import os
-import base64
 from datetime import datetime
 from urllib.parse import quote_plus
 import pandas as pd
 import streamlit as st
 import pydeck as pdk
 
+from utils.brand_assets import BrandAssets
+
 # -----------------------------
 # Feature toggles
 # -----------------------------
@@ -38,14 +38,13 @@ IG_PROFILE   = "prasad.reality_vizag"
 # -----------------------------
 # Logo auto-load (from repo)
 # -----------------------------
+@st.cache_resource
+def brand_assets():
+    # Resized once per process (and per logo mtime), not re-encoded every rerun.
+    return BrandAssets(serve_static=st.get_option("server.enableStaticServing"))
+
 def load_logo_src():
-    for name in ('prasad_logo.png', 'prasad_logo.jpg', 'prasad_logo.jpeg'):
-        if os.path.exists(name):
-            with open(name, 'rb') as f:
-                b64 = base64.b64encode(f.read()).decode('utf-8')
-            ext = name.split('.')[-1]
-            return f'data:image/{ext};base64,{b64}'
-    return None
+    return brand_assets().logo_src(height=56)
 
 logo_src = load_logo_src()
 
@@ -163,7 +162,7 @@ if logo_src:
     st.markdown(
         f"""
         <div class="brand-header">
-          {logo_src}
+          <img class="brand-logo" src="{logo_src}" alt="brand logo">
           <div>
             <h1>Prasad Reality Vizag</h1>
             <p>Browse, filter, and shortlist homes in Visakhapatnam—then share via WhatsApp in seconds.</p>